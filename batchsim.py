@@ -0,0 +1,171 @@
+import time
+import numpy as np
+from searchproblem import get_moves
+from setup import *
+
+'''
+Vectorized simulator running many headless games in lockstep.
+The rules match engine.Game/engine.Snake (and so snake.py): the tail retracts
+before the head lands, walls and body kill, eating grows the snake into the
+cell its tail just left and food respawns uniformly on a free cell with
+x in [1, rows - 1] and y in [1, cols - 1], like Game.random_food.
+
+State is held as arrays over the N games, with cells numbered x * cols + y:
+    occupied  (N, cells) bool occupancy
+    ring      (N, cells) ring buffer of body cells, the head at head_ptr
+    head_ptr  (N,) index of the head in ring
+    length    (N,) body length; the tail is at head_ptr - length + 1
+    food      (N,) cell of the food
+Actions are indices into searchproblem.get_moves().
+'''
+
+MOVES = get_moves()
+DX = np.array([action.value[0] for action in MOVES])
+DY = np.array([action.value[1] for action in MOVES])
+
+
+class BatchSnakeEnv:
+
+    '''
+    Input: n, number of games
+           board, the setup.Board every game is played on
+           seed, seeds the numpy Generator used for food placement
+           auto_reset, restart finished games at the end of step()
+    '''
+    def __init__(self, n, board=DEFAULT_BOARD, seed=None, auto_reset=True):
+        self.n = n
+        self.board = board
+        self.rows = board.rows
+        self.cols = board.cols
+        self.cells = board.cells
+        self.start = board.index(board.start_pos)
+        self.rng = np.random.default_rng(seed)
+        self.auto_reset = auto_reset
+
+        self.occupied = np.zeros((n, self.cells), dtype=bool)
+        self.ring = np.zeros((n, self.cells), dtype=np.int32)
+        self.head_ptr = np.zeros(n, dtype=np.int32)
+        self.length = np.zeros(n, dtype=np.int32)
+        self.food = np.zeros(n, dtype=np.int32)
+        self.score = np.zeros(n, dtype=np.int32)
+        self.done = np.zeros(n, dtype=bool)
+        # Score of each game's last finished episode, kept across auto resets
+        self.final_score = np.zeros(n, dtype=np.int32)
+        self.episodes = 0
+
+        # Food may only spawn where random_food can place it
+        x, y = np.divmod(np.arange(self.cells), self.cols)
+        self.spawnable = (x >= 1) & (y >= 1)
+        self.reset(np.ones(n, dtype=bool))
+
+    '''
+    Restarts the selected games with a one-cell snake at the start position
+    Input: mask, (N,) bool array of games to reset
+    '''
+    def reset(self, mask):
+        games = np.flatnonzero(mask)
+        if len(games) == 0:
+            return
+        self.occupied[games] = False
+        self.occupied[games, self.start] = True
+        self.head_ptr[games] = 0
+        self.ring[games, 0] = self.start
+        self.length[games] = 1
+        self.score[games] = 0
+        self.done[games] = False
+        self.spawn_food(games)
+
+    def spawn_food(self, games):
+        # A random key per free cell; the argmax is a uniform pick among the free cells
+        keys = self.rng.random((len(games), self.cells))
+        keys[self.occupied[games] | ~self.spawnable] = -1.0
+        self.food[games] = keys.argmax(axis=1)
+        # A board with no free cell left is a finished (won) game
+        full = keys.max(axis=1) < 0
+        self.done[games[full]] = True
+
+    def heads(self):
+        return self.ring[np.arange(self.n), self.head_ptr]
+
+    '''
+    Applies one move in every game.
+    Input: actions, (N,) array of indices into get_moves(); ignored for finished games
+    Returns: (ate, died), (N,) bool arrays for this step
+    '''
+    def step(self, actions):
+        games = np.arange(self.n)
+        alive = ~self.done
+        head = self.ring[games, self.head_ptr]
+        x, y = np.divmod(head, self.cols)
+        x = x + DX[actions]
+        y = y + DY[actions]
+
+        wall = alive & ((x < 0) | (x >= self.rows) | (y < 0) | (y >= self.cols))
+        moving = alive & ~wall
+        new_head = np.where(moving, x * self.cols + y, 0)
+
+        # The tail retracts first, so moving into the old tail cell is safe
+        tail_ptr = (self.head_ptr - self.length + 1) % self.cells
+        tail = self.ring[games, tail_ptr]
+        self.occupied[games[moving], tail[moving]] = False
+        body = moving & self.occupied[games, new_head]
+        moving &= ~body
+
+        self.head_ptr[moving] = (self.head_ptr[moving] + 1) % self.cells
+        self.ring[games[moving], self.head_ptr[moving]] = new_head[moving]
+        self.occupied[games[moving], new_head[moving]] = True
+
+        # Growing keeps the cell the tail just left, which is still in the ring
+        ate = moving & (new_head == self.food)
+        self.occupied[games[ate], tail[ate]] = True
+        self.length[ate] += 1
+        self.score[ate] += 1
+        self.spawn_food(games[ate])
+
+        died = wall | body
+        self.done |= died
+        finished = self.done & alive
+        self.final_score[finished] = self.score[finished]
+        self.episodes += int(finished.sum())
+        if self.auto_reset:
+            self.reset(finished)
+        return ate, died
+
+    '''
+    Simple vectorized policy: among the moves that do not die immediately,
+    take one that brings the head closest to the food
+    Returns: (N,) array of action indices
+    '''
+    def greedy_actions(self):
+        games = np.arange(self.n)
+        x, y = np.divmod(self.ring[games, self.head_ptr], self.cols)
+        food_x, food_y = np.divmod(self.food, self.cols)
+        tail = self.ring[games, (self.head_ptr - self.length + 1) % self.cells]
+        nx = x[:, None] + DX[None, :]
+        ny = y[:, None] + DY[None, :]
+        inside = (nx >= 0) & (nx < self.rows) & (ny >= 0) & (ny < self.cols)
+        cell = np.where(inside, nx * self.cols + ny, 0)
+        blocked = ~inside | (self.occupied[games[:, None], cell] & (cell != tail[:, None]))
+        distance = np.abs(nx - food_x[:, None]) + np.abs(ny - food_y[:, None])
+        distance = np.where(blocked, self.rows + self.cols + distance, distance)
+        return distance.argmin(axis=1)
+
+
+'''
+Runs the greedy policy for the given number of lockstep steps
+Returns: (steps per second, episodes finished, mean final score)
+'''
+def throughput(n=4096, steps=1000, seed=0, board=DEFAULT_BOARD):
+    env = BatchSnakeEnv(n, board, seed)
+    start = time.perf_counter()
+    for _ in range(steps):
+        env.step(env.greedy_actions())
+    elapsed = time.perf_counter() - start
+    return n * steps / elapsed, env.episodes, float(env.final_score.mean())
+
+
+if __name__ == '__main__':
+    rate, episodes, score = throughput()
+    print("Steps per second: " + str(rate))
+    print("Episodes:         " + str(episodes))
+    print("Mean final score: " + str(score))
@@ -0,0 +1,332 @@
+import argparse
+import gridsearch
+import hamiltonian
+import incremental
+import json
+import multiprocessing
+import os
+import random
+import searchproblem
+import util
+from engine import Game, Snake
+from search import *
+from setup import *
+from util import Log
+
+'''
+Headless batch runs of the search algorithms, used to gather and summarize
+the logs under data/. Runs on the engine alone, without pygame.
+'''
+
+
+'''
+Plays one game without a window.
+Input: seed, seeds the game's random.Random (food placement and, through a
+       stream derived from it, fallback moves); games with the same seed
+       are offered the same food sequence
+       instrument, record a util.SearchStats for every search in the log
+       board, the setup.Board to play on
+       budget, util.SearchBudget bounding every search (None searches to completion)
+'''
+def no_display_run(function, run_number, heuristic=util.manhattanDistance, seed=None, instrument=False,
+                   board=DEFAULT_BOARD, budget=None):
+    print("Begin Run " + str(run_number)+ " of "+ str(function.__name__))
+    snake = Snake(board.start_pos, board)
+    game = Game(snake, random.Random(seed))
+    dead = False
+    log = Log(function.__name__, heuristic.__name__, seed, board)
+    # One-off setup, such as solving a model or training a table, stays out of the turn times
+    warm_up = getattr(function, 'warm_up', None)
+    if warm_up is not None:
+        warm_up(game)
+    while not dead:
+        # initialize search problem
+        if budget is not None:
+            # Planners that never check the budget would otherwise report the last search's hit flag
+            budget.start()
+        log.start_stopwatch()
+        problem = searchproblem.SimpleSearchProblem(game, game.get_state(), budget)
+        stats = util.SearchStats() if instrument else None
+        moves = function(problem, heuristic, stats=stats)
+        log.stop_stopwatch()
+        if stats is not None:
+            log.record_search(stats)
+        if budget is not None and budget.hit:
+            log.record_deadline_hit()
+
+        for i in range(len(moves)):
+            score = game.score
+            death = game.advance(moves[i])
+            if game.score > score:
+                log.update(game.score)
+            if death:
+                dead = True
+                log.terminate(death)
+                break
+    print("End Run " + str(run_number) + " of " + str(function.__name__) + " with score " + str(game.score))
+    return log
+
+
+'''
+Worker entry point for the process pool
+Input: job, (index into ALGORITHMS, run number, seed, instrument, board, budget)
+Returns: (index, run number, the finished game's Log)
+'''
+def run_job(job):
+    i, run_number, seed, instrument, board, budget = job
+    log = no_display_run(ALGORITHMS[i][0], run_number, ALGORITHMS[i][1], seed, instrument, board, budget)
+    return i, run_number, log
+
+
+'''
+Input: workers, number of processes to spread the games over
+       algorithms, indices into ALGORITHMS to run (default all of them)
+       seed, run j of every algorithm is seeded with seed + j, so all
+           algorithms replay the same set of games
+       instrument, log a util.SearchStats for every search
+       board, the setup.Board to play on
+       budget, util.SearchBudget bounding every search (None searches to completion)
+'''
+def gather_empirical_data(workers=1, algorithms=None, seed=0, instrument=False, board=DEFAULT_BOARD,
+                          budget=None):
+    # Run the given number of tests on each algorithm, saving the results under the given filename
+    if algorithms is None:
+        algorithms = range(len(ALGORITHMS))
+    jobs = [(i, j + 1, seed + j, instrument, board, budget) for i in algorithms for j in range(NUM_TESTS)]
+    # Each session starts the selected logs afresh instead of appending forever
+    for i in algorithms:
+        open(ALGORITHMS[i][2], 'w').close()
+    if workers <= 1:
+        for job in jobs:
+            i, _, log = run_job(job)
+            log.save(ALGORITHMS[i][2])
+        return
+    # Games run in the workers; only this process writes, in job order,
+    # so the log files come out the same as a serial run
+    with multiprocessing.Pool(workers) as pool:
+        chunksize = max(1, len(jobs) // (workers * 8))
+        for i, _, log in pool.imap(run_job, jobs, chunksize):
+            log.save(ALGORITHMS[i][2])
+
+
+'''
+Returns: the short name of an ALGORITHMS entry, taken from its log filename
+'''
+def algorithm_name(entry):
+    return os.path.basename(entry[2])[:-len("_log.jsonl")]
+
+
+'''
+Returns: the text log an ALGORITHMS log filename had before the logs moved to
+         JSON lines, e.g. data/bfs_log.txt for data/bfs_log.jsonl
+'''
+def legacy_log_name(filename):
+    return filename[:-len(".jsonl")] + ".txt"
+
+
+'''
+Reads a text log written by the old util.Log.__str__ as "game" records.
+Input: filename, the text log
+Returns: generator of dicts shaped like the "game" records of util.Log.to_records
+'''
+def read_legacy_log(filename):
+    record = None
+    log = open(filename, 'r')
+    for line in log:
+        words = line.split()
+        if not words:
+            continue
+        if words[0] == "Algorithm:":
+            record = {'type': 'game', 'algorithm': words[1], 'heuristic': None, 'seed': None}
+        elif record is None:
+            continue
+        elif words[0] == "Heuristic:":
+            record['heuristic'] = words[1]
+        elif words[0] == "Score:":
+            record['score'] = int(words[1])
+        elif words[0] == "Times:":
+            # Times are quoted, one per food eaten
+            record['turns'] = line.count("'") // 2
+        elif words[0] == "Cause":
+            record['death'] = line.split(":", 1)[1].strip()
+        elif words[0] == "Total":
+            record['total_time'] = float(words[2])
+        elif words[0] == "Average":
+            record['average_time'] = float(words[2])
+            yield record
+            record = None
+    log.close()
+
+
+'''
+Input: filename, an ALGORITHMS log filename
+Returns: generator of the log's records, read from its legacy text log if the
+         JSON lines one has not been written yet (nothing if neither exists)
+'''
+def read_log(filename):
+    if os.path.exists(filename):
+        log = open(filename, 'r')
+        for line in log:
+            yield json.loads(line)
+        log.close()
+    elif os.path.exists(legacy_log_name(filename)):
+        yield from read_legacy_log(legacy_log_name(filename))
+
+
+'''
+Streams through a game log, keeping only running totals.
+Input: filename, a log written by util.Log.save (or its legacy text log)
+Returns: dict summarizing the games in the log (None if it holds no games or does not exist)
+'''
+def summarize_log(filename):
+    summary = None
+    total_avg_time = 0
+    timed_games = 0
+    for record in read_log(filename):
+        if record['type'] != 'game':
+            continue
+        if summary is None:
+            summary = {'algorithm': record['algorithm'],
+                       'heuristic': record['heuristic'],
+                       'games': 0,
+                       'total_score': 0,
+                       'high_score': float('-inf'),
+                       'low_score': float('inf'),
+                       'longest_turn': float('-inf'),
+                       'shortest_turn': float('inf')}
+        summary['games'] += 1
+        summary['total_score'] += record['score']
+        summary['high_score'] = max(summary['high_score'], record['score'])
+        summary['low_score'] = min(summary['low_score'], record['score'])
+        # Turn times are compared by each game's average, as before
+        if record['average_time'] is not None:
+            timed_games += 1
+            total_avg_time += record['average_time']
+            summary['longest_turn'] = max(summary['longest_turn'], record['average_time'])
+            summary['shortest_turn'] = min(summary['shortest_turn'], record['average_time'])
+    if summary is not None:
+        summary['average_turn'] = total_avg_time / timed_games if timed_games else None
+        summary['average_score'] = summary['total_score'] / summary['games']
+    return summary
+
+
+'''
+Appends a testing session to data/results.txt summarizing the selected logs.
+Logs that are missing or empty are skipped, and nothing is written if none is left.
+'''
+def parse_empirical_data(algorithms=None, board=DEFAULT_BOARD):
+    # Extracting the names of the files to parse
+    if algorithms is None:
+        algorithms = range(len(ALGORITHMS))
+    summaries = []
+    for i in algorithms:
+        summary = summarize_log(ALGORITHMS[i][2])
+        if summary is not None:
+            summaries.append(summary)
+    if not summaries:
+        print("No logs to summarize; run with --gather first")
+        return
+    # Header with information about the current automated test run
+    data_file = open("data/results.txt", 'a')
+    data_file.write("----- BEGINNING OF AUTOMATED TESTING SESSION -----\n")
+    data_file.write("Rows:    " + str(board.rows) + "\n")
+    data_file.write("Columns: " + str(board.cols) + "\n")
+    data_file.write("Number of Tests: " + str(NUM_TESTS) + "\n")
+    data_file.write("\n---\n")
+    # Record the calculations for each file in the results file
+    for summary in summaries:
+        data_file.write("Algorithm: " + summary['algorithm'] + "\n")
+        data_file.write("Heuristic: " + str(summary['heuristic']) + "\n")
+        data_file.write("Average Turn Time:  " + str(summary['average_turn']) + "\n")
+        data_file.write("Fastest Turn Time:  " + str(summary['shortest_turn']) + "\n")
+        data_file.write("Longest Turn Time:  " + str(summary['longest_turn']) + "\n")
+        data_file.write("Average Game Score: " + str(summary['average_score']) + "\n")
+        data_file.write("High Score:         " + str(summary['high_score']) + "\n")
+        data_file.write("Low Score:          " + str(summary['low_score']) + "\n")
+        data_file.write("---\n")
+
+    data_file.write("----- END OF AUTOMATED TESTING SESSION -----\n\n\n")
+    data_file.close()
+
+
+# Used to run automated testing
+# DFS, DLS, BFS, BFS+, UCS, UCS+, [A-star, A-star+, Greedy, Greedy+] x [Manhattan Distance, Food Trapped]
+# then [A-star, A-star+, Greedy, Greedy+] x [Food Distance]
+# then D* Lite, replanning incrementally after every move
+# then the solved MDP policy, modelling the first two body segments, and the Q-learned policy
+# then the Hamiltonian cycle with shortcuts
+# then bidirectional BFS and A* over the grid, with the body as static walls
+# then jump point search, handing plans that must detour to A-star
+# then BFS and A-star on time-indexed occupancy, with (head, depth) nodes instead of snake copies
+# Any heuristic can be memoized by wrapping it, e.g. util.HeuristicCache(util.foodTrappedHeuristic);
+# its hits and misses per search are logged with --instrument
+# Still some issue with DFS? (dfs, util.manhattanDistance, "data/dfs_log.jsonl"),
+ALGORITHMS = [(dls, util.manhattanDistance, "data/dls_log.jsonl"),
+              (bfs, util.manhattanDistance, "data/bfs_log.jsonl"),
+              (bfs_plus, util.manhattanDistance, "data/bfs_plus_log.jsonl"),
+              (ucs, util.manhattanDistance, "data/ucs_log.jsonl"),
+              (ucs_plus, util.manhattanDistance, "data/ucs_plus_log.jsonl"),
+              (astar, util.manhattanDistance, "data/astar_manhattan_log.jsonl"),
+              (astar, util.foodTrappedHeuristic, "data/astar_food_trapped_log.jsonl"),
+              (astar_plus, util.manhattanDistance, "data/astar_plus_manhattan_log.jsonl"),
+              (astar_plus, util.foodTrappedHeuristic, "data/astar_plus_food_trapped_log.jsonl"),
+              (greedy, util.manhattanDistance, "data/greedy_manhattan_log.jsonl"),
+              (greedy, util.foodTrappedHeuristic, "data/greedy_food_trapped_log.jsonl"),
+              (greedy_plus, util.manhattanDistance, "data/greedy_plus_manhattan_log.jsonl"),
+              (greedy_plus, util.foodTrappedHeuristic, "data/greedy_plus_food_trapped_log.jsonl"),
+              (astar, util.foodDistanceHeuristic, "data/astar_food_distance_log.jsonl"),
+              (astar_plus, util.foodDistanceHeuristic, "data/astar_plus_food_distance_log.jsonl"),
+              (greedy, util.foodDistanceHeuristic, "data/greedy_food_distance_log.jsonl"),
+              (greedy_plus, util.foodDistanceHeuristic, "data/greedy_plus_food_distance_log.jsonl"),
+              (incremental.dstar_lite, util.manhattanDistance, "data/dstar_lite_log.jsonl")]
+
+# The MDP and Q-learning planners need NumPy; without it their entries are left out
+try:
+    import mdp
+    import qlearning
+except ModuleNotFoundError as error:
+    if error.name != 'numpy':
+        raise
+else:
+    ALGORITHMS += [(mdp.mdp_policy, util.manhattanDistance, "data/mdp_policy_log.jsonl"),
+                   (qlearning.q_policy, util.manhattanDistance, "data/q_policy_log.jsonl")]
+
+ALGORITHMS += [(hamiltonian.hamiltonian, util.manhattanDistance, "data/hamiltonian_log.jsonl"),
+               (gridsearch.bidirectional_bfs, util.manhattanDistance, "data/bidirectional_bfs_log.jsonl"),
+               (gridsearch.bidirectional_astar, util.manhattanDistance, "data/bidirectional_astar_log.jsonl"),
+               (gridsearch.jump_point_search, util.manhattanDistance, "data/jump_point_search_log.jsonl"),
+               (timed_bfs, util.manhattanDistance, "data/timed_bfs_log.jsonl"),
+               (timed_astar, util.manhattanDistance, "data/timed_astar_manhattan_log.jsonl")]
+
+NUM_TESTS = 500
+
+if __name__ == '__main__':
+    names = [algorithm_name(entry) for entry in ALGORITHMS]
+    parser = argparse.ArgumentParser(description="Gather and summarize headless search runs")
+    parser.add_argument("--gather", action="store_true",
+                        help="play NUM_TESTS games per algorithm before summarizing")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="number of worker processes for --gather (default: all cores)")
+    parser.add_argument("--algorithms", nargs="+", choices=names, default=names, metavar="NAME",
+                        help="algorithms to run and summarize: " + ", ".join(names))
+    parser.add_argument("--seed", type=int, default=0,
+                        help="seed of the first game; run j of every algorithm uses seed + j")
+    parser.add_argument("--instrument", action="store_true",
+                        help="log node counts, frontier size and timings for every search")
+    parser.add_argument("--rows", type=int, default=ROWS, help="board rows")
+    parser.add_argument("--cols", type=int, default=COLS, help="board columns")
+    parser.add_argument("--deadline-ms", type=float, default=None,
+                        help="per-turn planning deadline; searches past it play their best partial plan")
+    parser.add_argument("--node-budget", type=int, default=None,
+                        help="per-turn limit on expanded nodes, like --deadline-ms")
+    args = parser.parse_args()
+
+    board = Board(args.rows, args.cols)
+    budget = None
+    if args.deadline_ms is not None or args.node_budget is not None:
+        seconds = args.deadline_ms / 1000.0 if args.deadline_ms is not None else None
+        budget = util.SearchBudget(seconds, args.node_budget)
+    selected = [names.index(name) for name in args.algorithms]
+    if args.gather:
+        gather_empirical_data(args.workers, selected, args.seed, args.instrument, board, budget)
+    parse_empirical_data(selected, board)
@@ -0,0 +1,127 @@
+import random
+from collections import deque
+from util import Action
+from setup import *
+from snakestate import SnakeState, DELTAS
+
+'''
+Headless game rules: moving, growing, colliding and spawning food.
+Nothing in here imports pygame, so search and batch runs never touch SDL;
+snake.py draws these objects and feeds them keyboard input.
+'''
+
+
+class Game:
+    '''
+    Input: snake, the engine Snake to play with; the game is played on its board
+           rng, random.Random driving food placement; pass one seeded with
+               the same value to replay a game exactly
+    '''
+    def __init__(self, snake, rng=None):
+        self.snake = snake
+        self.board = snake.board
+        self.rng = rng if rng is not None else random.Random()
+        # Fallback moves draw from their own stream, seeded off the food one,
+        # so they never shift the food sequence of games on the same seed
+        self.move_rng = random.Random(self.rng.getrandbits(64))
+        self.food = None
+        self.score = 0
+        self.random_food()
+
+    def get_state(self):
+        return SnakeState(self.snake.body, self.food, self.board)
+
+    def get_new_state(self, state, action):
+        return state.step(action)
+
+    '''
+    Places the food on a random free cell. Each spawn takes exactly one draw
+    from rng, seeding the stream of candidate cells, so games on the same
+    seed are offered the same candidates however differently they are played,
+    and get the same food whenever the first candidate free in one is free
+    in the other.
+    '''
+    def random_food(self):
+        candidates = random.Random(self.rng.getrandbits(64))
+        # Error checking - inside border, not on top of snake body
+        snake_positions = set(self.snake.body)
+        rows, cols = self.board.rows, self.board.cols
+        # Food never spawns in row or column 0; once the rest is covered there is nowhere left
+        if sum(1 for x, y in snake_positions if x >= 1 and y >= 1) >= (rows - 1) * (cols - 1):
+            self.food = None
+            return self.food
+        while True:
+            food_x = candidates.randint(1, rows-1)
+            food_y = candidates.randint(1, cols-1)
+            if (food_x, food_y) not in snake_positions:
+                break
+        self.food = (food_x, food_y)
+        return self.food
+
+    def food_eaten(self, head_pos):
+        if self.food:
+            return head_pos == self.food
+        return False
+
+    '''
+    Moves the snake one cell (in its current direction if no action is given),
+    growing it and respawning the food when the food is eaten.
+    Returns: the reason the game ended ("Board Full" if there is no cell left
+             for the food), or None if the game goes on
+    '''
+    def advance(self, action=None):
+        self.snake.move(action)
+        if self.snake.wall_collide():
+            return "Wall Collision"
+        if self.snake.body_collide():
+            return "Body Collision"
+        if self.food_eaten(self.snake.head):
+            self.score += 1
+            self.snake.add_segment()
+            if self.random_food() is None:
+                return "Board Full"
+        return None
+
+
+class Snake:
+    '''
+    Input: head_pos, starting cell
+           board, the setup.Board the snake moves on
+           body, cells from head_pos to the tail to start with (default just head_pos)
+    '''
+    def __init__(self, head_pos, board=DEFAULT_BOARD, body=None):
+        self.board = board
+        self.origin = tuple(body) if body is not None else (head_pos,)
+        self.direction = Action.STOP
+        # Cells from head to tail
+        self.body = deque(self.origin)
+        # Cell given up by the tail on the last move, where a new segment grows
+        self.last_tail = self.origin[-1]
+
+    @property
+    def head(self):
+        return self.body[0]
+
+    def reset(self):
+        self.direction = Action.STOP
+        self.body = deque(self.origin)
+        self.last_tail = self.origin[-1]
+
+    def move(self, action=None):
+        if action is not None:
+            self.direction = action
+        dx, dy = DELTAS[self.direction]
+        head = self.body[0]
+        # Every segment follows the one ahead of it, so only the ends change
+        self.body.appendleft((head[0] + dx, head[1] + dy))
+        self.last_tail = self.body.pop()
+
+    def add_segment(self):
+        self.body.append(self.last_tail)
+
+    def body_collide(self):
+        return self.body.count(self.body[0]) > 1
+
+    def wall_collide(self):
+        # Check if out of bounds on any side
+        return not self.board.in_bounds(self.body[0])
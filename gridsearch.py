@@ -0,0 +1,331 @@
+import search
+import util
+from incremental import ACTIONS, INF, neighbors, manhattan
+from search import failsafe
+
+'''
+Bidirectional searches over the board grid: one search grows forward from
+the head, the other backward from the food, and the path is joined where
+they meet. Each side explores roughly a disc of half the head-to-food
+distance, instead of one disc of the whole distance.
+
+The backward search cannot know when the tail will have moved out of a cell,
+so both sides use a static obstacle model: every body cell except the head
+is a wall for the whole plan. Walls only retract along the tail and the path
+never revisits a cell, so a path through currently free cells is safe; the
+model is conservative and can miss paths that rely on the tail moving away.
+
+Both honour the problem's util.SearchBudget like search.graph_search: out of
+budget, they walk to the forward cell closest to the food (every cell the
+forward side reached is safe to walk to), or play failsafe's safe move.
+
+jump_point_search works forward only, so it can model the tail moving away:
+a body cell blocks the head only until the step it frees up
+(SnakeState.release_times). It prunes the symmetric orderings of moves that
+a plain A* expands one by one on an open board, and only queues the cells
+where a shortest path may have to turn; it also honours the budget.
+'''
+
+
+'''
+Returns: the actions walking the given list of adjacent cells
+'''
+def cells_to_actions(cells):
+    return [ACTIONS[(b[0] - a[0], b[1] - a[1])] for a, b in zip(cells, cells[1:])]
+
+
+'''
+Returns: every cell along the straight segments joining consecutive points
+'''
+def fill_segments(points):
+    cells = points[:1]
+    for a, b in zip(points, points[1:]):
+        dx = (b[0] > a[0]) - (b[0] < a[0])
+        dy = (b[1] > a[1]) - (b[1] < a[1])
+        pos = a
+        while pos != b:
+            pos = (pos[0] + dx, pos[1] + dy)
+            cells.append(pos)
+    return cells
+
+
+'''
+Returns: the cells from the start to the goal through meet, given each side's parent map
+'''
+def join(meet, forward_parents, backward_parents):
+    cells = []
+    pos = meet
+    while pos is not None:
+        cells.append(pos)
+        pos = forward_parents[pos]
+    cells.reverse()
+    pos = backward_parents[meet]
+    while pos is not None:
+        cells.append(pos)
+        pos = backward_parents[pos]
+    return cells
+
+
+def give_up(problem, state, stats):
+    if stats is not None:
+        stats.failsafe = True
+    return failsafe(problem, state)
+
+
+'''
+Called once the budget runs out
+Input: depth, forward cost of every cell the forward side reached, and parents
+       (which may be further back along a straight line)
+Returns: actions to the reached cell closest to the food, nearest first on ties
+'''
+def partial_plan(problem, state, depth, parents, stats):
+    if stats is not None:
+        stats.deadline_hit = True
+    reached = [pos for pos in depth if pos != state.head]
+    if not reached:
+        return give_up(problem, state, stats)
+    pos = min(reached, key=lambda pos: (manhattan(pos, state.food), depth[pos]))
+    cells = []
+    while pos is not None:
+        cells.append(pos)
+        pos = parents[pos]
+    return cells_to_actions(fill_segments(cells[::-1]))
+
+
+'''
+Bidirectional breadth-first search, expanding the smaller side one whole
+layer at a time. Once a layer reaches the other side the layer is finished
+and the shortest join through it is taken.
+Input: search problem, heuristic (unused), optional util.SearchStats
+Returns: search path, a sequence of actions
+'''
+def bidirectional_bfs(problem, heuristic=None, stats=None):
+    budget = problem.budget
+    if budget is not None:
+        budget.start()
+    expansions = 0
+    state = problem.get_start_state()
+    board = state.board
+    blocked = set(state.body[1:])
+    forward = {state.head: 0}
+    backward = {state.food: 0}
+    forward_parents = {state.head: None}
+    backward_parents = {state.food: None}
+    forward_layer = [state.head]
+    backward_layer = [state.food]
+
+    while forward_layer and backward_layer:
+        if len(forward_layer) <= len(backward_layer):
+            layer, depth, parents, other = forward_layer, forward, forward_parents, backward
+        else:
+            layer, depth, parents, other = backward_layer, backward, backward_parents, forward
+        next_layer = []
+        best = INF
+        meet = None
+        for pos in layer:
+            if budget is not None and budget.expired(expansions):
+                return partial_plan(problem, state, forward, forward_parents, stats)
+            expansions += 1
+            if stats is not None:
+                stats.expanded += 1
+            for neighbor in neighbors(pos, board):
+                if neighbor in blocked or neighbor in depth:
+                    continue
+                depth[neighbor] = depth[pos] + 1
+                parents[neighbor] = pos
+                next_layer.append(neighbor)
+                if neighbor in other and depth[neighbor] + other[neighbor] < best:
+                    best = depth[neighbor] + other[neighbor]
+                    meet = neighbor
+        if stats is not None:
+            stats.generated += len(next_layer)
+            stats.frontier_peak = max(stats.frontier_peak, len(next_layer))
+        if layer is forward_layer:
+            forward_layer = next_layer
+        else:
+            backward_layer = next_layer
+        if meet is not None:
+            if stats is not None:
+                stats.closed_size = len(forward) + len(backward)
+            return cells_to_actions(join(meet, forward_parents, backward_parents))
+
+    return give_up(problem, state, stats)
+
+
+'''
+Bidirectional A* with Manhattan distance to the opposite end on each side,
+expanding whichever side has the smaller open list. The shortest join seen so
+far is returned once it is no longer than the lowest f on either open list,
+which no path through an unexpanded cell can beat.
+Input: search problem, heuristic (unused: the sides need a cell heuristic),
+       optional util.SearchStats
+Returns: search path, a sequence of actions
+'''
+def bidirectional_astar(problem, heuristic=None, stats=None):
+    budget = problem.budget
+    if budget is not None:
+        budget.start()
+    expansions = 0
+    state = problem.get_start_state()
+    board = state.board
+    blocked = set(state.body[1:])
+    start, goal = state.head, state.food
+    forward = (util.PriorityQueue(), {start: 0}, {start: None}, set(), goal)
+    backward = (util.PriorityQueue(), {goal: 0}, {goal: None}, set(), start)
+    forward[0].push(start, manhattan(start, goal), start)
+    backward[0].push(goal, manhattan(goal, start), goal)
+    best = INF
+    meet = None
+
+    while not forward[0].isEmpty() and not backward[0].isEmpty():
+        if best <= max(forward[0].peek()[0], backward[0].peek()[0]):
+            break
+        if budget is not None and budget.expired(expansions):
+            if meet is None:
+                return partial_plan(problem, state, forward[1], forward[2], stats)
+            # A join already reaches the food, if perhaps not the shortest one
+            if stats is not None:
+                stats.deadline_hit = True
+            break
+        expansions += 1
+        side, other = (forward, backward) if len(forward[0]) <= len(backward[0]) else (backward, forward)
+        frontier, g, parents, closed, target = side
+        pos = frontier.pop()
+        closed.add(pos)
+        if stats is not None:
+            stats.expanded += 1
+        for neighbor in neighbors(pos, board):
+            if neighbor in blocked or neighbor in closed:
+                continue
+            cost = g[pos] + 1
+            if cost < g.get(neighbor, INF):
+                g[neighbor] = cost
+                parents[neighbor] = pos
+                frontier.update(neighbor, cost + manhattan(neighbor, target), neighbor)
+                if stats is not None:
+                    stats.generated += 1
+                if neighbor in other[1] and cost + other[1][neighbor] < best:
+                    best = cost + other[1][neighbor]
+                    meet = neighbor
+        if stats is not None:
+            stats.frontier_peak = max(stats.frontier_peak, len(forward[0]) + len(backward[0]))
+
+    if meet is None:
+        return give_up(problem, state, stats)
+    if stats is not None:
+        stats.closed_size = len(forward[3]) + len(backward[3])
+    return cells_to_actions(join(meet, forward[2], backward[2]))
+
+
+'''
+Jump point search for the 4-connected board with time-indexed walls: a cell
+blocks the head at depth d while its release time is over d.
+
+The search only makes moves towards the food, so every cell is reached at
+depth equal to its Manhattan distance from the head, any path it finds is a
+shortest one, and the walls it meets are fixed by the cell. Among these
+paths it keeps the canonical order that takes a move along x before a move
+along y wherever both are open: a path only turns from y to x at a forced
+cell, one whose x neighbour is open while the cell behind it had that
+neighbour blocked one step earlier. Runs along x scan along y at every cell
+and stop where the scan finds something; runs along y stop at forced cells
+and the food. The cells the runs stop at are expanded nearest the food first.
+
+When the body walls off every path of Manhattan length, the shortest one
+has to detour and possibly wait for the tail, and the plan is handed to
+search.astar, on what is left of the budget.
+Input: search problem, heuristic (for the astar hand-off),
+       optional util.SearchStats
+Returns: search path, a sequence of actions; as short as astar's
+'''
+def jump_point_search(problem, heuristic=None, stats=None):
+    budget = problem.budget
+    if budget is not None:
+        budget.start()
+    expansions = 0
+    state = problem.get_start_state()
+    board = state.board
+    cols = board.cols
+    release = state.release_times()
+    start, goal = state.head, state.food
+    # Runs stay inside the box spanned by the head and the food
+    dx = (goal[0] > start[0]) - (goal[0] < start[0])
+    dy = (goal[1] > start[1]) - (goal[1] < start[1])
+    low_x, high_x = min(start[0], goal[0]), max(start[0], goal[0])
+    low_y, high_y = min(start[1], goal[1]), max(start[1], goal[1])
+
+    def free(x, y, depth):
+        return low_x <= x <= high_x and low_y <= y <= high_y and release[x * cols + y] <= depth
+
+    def forced(x, y, depth):
+        # The cell behind could not have turned along x a step earlier
+        return free(x + dx, y, depth + 1) and not free(x + dx, y - dy, depth)
+
+    def jump_y(x, y, depth):
+        while True:
+            y += dy
+            depth += 1
+            if not free(x, y, depth):
+                return None
+            if (x, y) == goal or (dx != 0 and forced(x, y, depth)):
+                return (x, y), depth
+
+    def jump_x(x, y, depth):
+        while True:
+            x += dx
+            depth += 1
+            if not free(x, y, depth):
+                return None
+            if (x, y) == goal or (dy != 0 and jump_y(x, y, depth)):
+                return (x, y), depth
+
+    frontier = util.PriorityQueue()
+    g = {start: 0}
+    parents = {start: None}
+    # True for cells reached by a run along x, which may turn either way
+    along_x = {start: True}
+    frontier.push(start, manhattan(start, goal), start)
+
+    while not frontier.isEmpty():
+        if budget is not None and budget.expired(expansions):
+            return partial_plan(problem, state, g, parents, stats)
+        expansions += 1
+        pos = frontier.pop()
+        if pos == goal:
+            if stats is not None:
+                stats.closed_size = len(g) - len(frontier)
+            points = []
+            while pos is not None:
+                points.append(pos)
+                pos = parents[pos]
+            return cells_to_actions(fill_segments(points[::-1]))
+        if stats is not None:
+            stats.expanded += 1
+        x, y = pos
+        depth = g[pos]
+        jumps = []
+        if dx != 0 and (along_x[pos] or forced(x, y, depth)):
+            jumps.append((jump_x(x, y, depth), True))
+        if dy != 0:
+            jumps.append((jump_y(x, y, depth), False))
+        for found, run_x in jumps:
+            if found is None:
+                continue
+            point, cost = found
+            if point in g:
+                if run_x and not along_x[point]:
+                    # Now free to turn along x too; expanded again if it already was
+                    along_x[point] = True
+                    if point not in frontier:
+                        frontier.push(point, manhattan(point, goal), point)
+                continue
+            g[point] = cost
+            parents[point] = pos
+            along_x[point] = run_x
+            frontier.push(point, manhattan(point, goal), point)
+            if stats is not None:
+                stats.generated += 1
+                stats.frontier_peak = max(stats.frontier_peak, len(frontier))
+
+    return search.resume(search.astar, problem, heuristic or util.manhattanDistance, stats=stats,
+                         expanded=expansions)
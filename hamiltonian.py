@@ -0,0 +1,93 @@
+from functools import lru_cache
+from incremental import ACTIONS, neighbors
+from setup import *
+
+'''
+Hamiltonian-cycle agent. A cycle through every cell of the board is built
+once per board size; following it can never collide, because the body always
+lies on the stretch of the cycle just behind the head. Shortcuts skip ahead
+along the cycle towards the food, but never as far as the tail, so that
+invariant survives them.
+'''
+
+# Shortcuts stop once the snake covers this share of the board
+SHORTCUT_LIMIT = 0.5
+
+
+'''
+Builds a Hamiltonian cycle of the board: boustrophedon rows over columns
+1 .. cols - 1, then back up column 0. At least one side must be even.
+Input: rows, cols, board size
+Returns: (cycle, order), the cells in cycle order and a dict of cell -> position in it
+'''
+@lru_cache(maxsize=None)
+def hamiltonian_cycle(rows, cols):
+    if rows < 2 or cols < 2 or (rows % 2 and cols % 2):
+        raise ValueError("No Hamiltonian cycle on a " + str(rows) + "x" + str(cols) + " board")
+    transpose = rows % 2 == 1
+    if transpose:
+        rows, cols = cols, rows
+    cycle = []
+    for x in range(rows):
+        ys = range(1, cols) if x % 2 == 0 else range(cols - 1, 0, -1)
+        cycle.extend((x, y) for y in ys)
+    cycle.extend((x, 0) for x in range(rows - 1, -1, -1))
+    if transpose:
+        cycle = [(y, x) for x, y in cycle]
+    order = {pos: i for i, pos in enumerate(cycle)}
+    return cycle, order
+
+
+class HamiltonianAgent:
+
+    '''
+    Input: shortcuts, allow skipping ahead along the cycle towards the food
+    '''
+    def __init__(self, shortcuts=True):
+        self.__name__ = "hamiltonian" if shortcuts else "hamiltonian_no_shortcuts"
+        self.shortcuts = shortcuts
+
+    '''
+    Lays a starting body of the given length along the cycle, the head on the
+    start position and the rest on the cells just behind it, as the agent
+    needs (used by scaling.play)
+    Returns: list of cells from head to tail
+    '''
+    def initial_body(self, board, length):
+        cycle, order = hamiltonian_cycle(board.rows, board.cols)
+        if length > len(cycle):
+            raise ValueError("A snake of length " + str(length) + " does not fit on " + repr(board))
+        head = order[board.start_pos]
+        return [cycle[(head - i) % len(cycle)] for i in range(length)]
+
+    '''
+    Search function interface, like the functions in search.py
+    Input: search problem, heuristic (unused), optional util.SearchStats
+    Returns: search path of a single action
+    '''
+    def __call__(self, problem, heuristic=None, stats=None):
+        state = problem.get_start_state()
+        board = state.board
+        cycle, order = hamiltonian_cycle(board.rows, board.cols)
+        size = len(cycle)
+        head = order[state.head]
+        target = cycle[(head + 1) % size]
+
+        if self.shortcuts and state.length < size * SHORTCUT_LIMIT:
+            # Cells between the head and the tail, going forward along the cycle, are free
+            tail_gap = (order[state.tail] - head) % size if state.length > 1 else size
+            # Never skip past the food, nor up to the tail
+            limit = min((order[state.food] - head) % size, tail_gap - 1)
+            best = 1
+            for pos in neighbors(state.head, board):
+                ahead = (order[pos] - head) % size
+                if best < ahead <= limit and not state.is_occupied(pos):
+                    best = ahead
+                    target = pos
+
+        if stats is not None:
+            stats.expanded += 1
+        return [ACTIONS[(target[0] - state.head[0], target[1] - state.head[1])]]
+
+
+hamiltonian = HamiltonianAgent()
@@ -0,0 +1,196 @@
+import util
+from search import failsafe
+from setup import *
+from snakestate import DELTAS
+
+'''
+Incremental replanning with D* Lite (Koenig & Likhachev).
+The planner searches backwards from the food over the board grid, treating
+every body cell except the head as a wall. Between calls it keeps its g/rhs
+values and queue, and when it is called again with the same food it only
+repairs the cells that changed: the cell the head left, the cells the tail
+freed and the cell the head entered. These are read off the two bodies
+around the old head, so a repair costs the moves made, not the snake's
+length. A new food position, board or game starts a new search.
+
+Walls only ever shrink back along the tail and the path never revisits a
+cell, so a path through currently free cells is safe to follow.
+'''
+
+INF = float('inf')
+
+# (dx, dy) -> action, for turning a path of cells back into moves
+ACTIONS = {delta: action for action, delta in DELTAS.items() if action != util.Action.STOP}
+
+
+def neighbors(pos, board=DEFAULT_BOARD):
+    x, y = pos
+    cells = []
+    for dx, dy in ACTIONS:
+        if 0 <= x + dx < board.rows and 0 <= y + dy < board.cols:
+            cells.append((x + dx, y + dy))
+    return cells
+
+
+def manhattan(a, b):
+    return abs(a[0] - b[0]) + abs(a[1] - b[1])
+
+
+class DStarLite:
+
+    '''
+    Input: horizon, number of moves returned per call; the default of one
+           replans after every move, which is where the repairs pay off
+    '''
+    def __init__(self, horizon=1):
+        self.__name__ = "dstar_lite"
+        self.horizon = horizon
+        self.goal = None
+        self.board = None
+        self.game = None
+        self.stats = None
+
+    '''
+    Search function interface, like the functions in search.py
+    Input: search problem, heuristic (unused: D* Lite needs its own,
+           consistent, Manhattan distance), optional util.SearchStats
+    Returns: search path, a sequence of actions
+    '''
+    def __call__(self, problem, heuristic=None, stats=None):
+        self.stats = stats
+        state = problem.get_start_state()
+        game = getattr(problem, 'game', None)
+        if state.food != self.goal or state.board != self.board or game is not self.game:
+            self.board = state.board
+            self.game = game
+            self.reset(state.head, state.food, state.body)
+        else:
+            self.move_start(state.head)
+            if not self.update_walls(state.body):
+                # Not the snake of the last call a few moves on
+                self.reset(state.head, state.food, state.body)
+        self.compute_shortest_path()
+
+        path = self.extract_path()
+        if not path:
+            if stats is not None:
+                stats.failsafe = True
+            return failsafe(problem, state)
+        return path
+
+    def reset(self, start, goal, body):
+        self.start = start
+        self.last_start = start
+        self.goal = goal
+        self.body = body
+        self.blocked = set(body[1:])
+        self.km = 0
+        self.g = {}
+        self.rhs = {goal: 0}
+        self.queue = util.PriorityQueue()
+        self.queue.push(goal, self.calculate_key(goal), goal)
+
+    def move_start(self, start):
+        self.start = start
+        # Keys already queued were computed from the old start; raise the bound instead of requeueing
+        self.km += manhattan(self.last_start, start)
+        self.last_start = start
+
+    '''
+    Moves the walls from the body of the last call to the given one
+    Returns: false if the old head is not among the first cells of the new
+             body, so the changes cannot be read off the two bodies
+    '''
+    def update_walls(self, body):
+        old = self.body
+        moved = None
+        for i in range(min(len(body), self.horizon + 2)):
+            if body[i] == old[0]:
+                moved = i
+                break
+        if moved is None:
+            return False
+        self.body = body
+        # Past the old head the new body is the front of the old one; the rest of it has been freed
+        freed = old[len(body) - moved:]
+        for pos in freed:
+            self.blocked.discard(pos)
+        for pos in body[1:moved + 1]:
+            self.blocked.add(pos)
+        self.blocked.discard(body[0])
+        for pos in set(freed) | set(body[:moved + 1]):
+            self.update_vertex(pos)
+            for neighbor in neighbors(pos, self.board):
+                self.update_vertex(neighbor)
+        return True
+
+    def calculate_key(self, pos):
+        best = min(self.g.get(pos, INF), self.rhs.get(pos, INF))
+        return (best + manhattan(self.start, pos) + self.km, best)
+
+    def cost(self, a, b):
+        if a in self.blocked or b in self.blocked:
+            return INF
+        return 1
+
+    def update_vertex(self, pos):
+        if pos != self.goal:
+            best = INF
+            for neighbor in neighbors(pos, self.board):
+                candidate = self.cost(pos, neighbor) + self.g.get(neighbor, INF)
+                if candidate < best:
+                    best = candidate
+            self.rhs[pos] = best
+        if pos in self.queue:
+            self.queue.remove(pos)
+        if self.g.get(pos, INF) != self.rhs.get(pos, INF):
+            self.queue.push(pos, self.calculate_key(pos), pos)
+
+    def compute_shortest_path(self):
+        queue = self.queue
+        while not queue.isEmpty():
+            old_key, pos = queue.peek()
+            start_key = self.calculate_key(self.start)
+            if old_key >= start_key and self.rhs.get(self.start, INF) == self.g.get(self.start, INF):
+                break
+            new_key = self.calculate_key(pos)
+            if old_key < new_key:
+                queue.push(pos, new_key, pos)
+                continue
+            queue.pop()
+            if self.stats is not None:
+                self.stats.expanded += 1
+            if self.g.get(pos, INF) > self.rhs.get(pos, INF):
+                self.g[pos] = self.rhs[pos]
+                for neighbor in neighbors(pos, self.board):
+                    self.update_vertex(neighbor)
+            else:
+                self.g[pos] = INF
+                self.update_vertex(pos)
+                for neighbor in neighbors(pos, self.board):
+                    self.update_vertex(neighbor)
+            if self.stats is not None and len(queue) > self.stats.frontier_peak:
+                self.stats.frontier_peak = len(queue)
+
+    '''
+    Returns: up to horizon moves that greedily descend g from the start,
+             or an empty list if the food cannot be reached
+    '''
+    def extract_path(self):
+        path = []
+        pos = self.start
+        while pos != self.goal and len(path) < self.horizon:
+            best = None
+            best_cost = INF
+            for neighbor in neighbors(pos, self.board):
+                candidate = self.cost(pos, neighbor) + self.g.get(neighbor, INF)
+                if candidate < best_cost:
+                    best, best_cost = neighbor, candidate
+            if best is None:
+                break
+            path.append(ACTIONS[(best[0] - pos[0], best[1] - pos[1])])
+            pos = best
+        return path
+
+
+dstar_lite = DStarLite()
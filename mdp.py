@@ -1,5 +1,32 @@
 import random
+import numpy as np
+from collections import deque
+from search import failsafe
 from searchproblem import get_moves
+from setup import *
+from snakestate import SnakeState
+
+'''
+The snake game as a Markov decision process.
+The snake moves deterministically; the randomness is in where the food
+respawns after it is eaten, uniformly over the free cells with x in
+[1, rows - 1] and y in [1, cols - 1] (like engine.Game.random_food).
+
+The full state space grows with the snake, so Markov can cap the modelled
+body at max_length segments: a capped snake that eats keeps its length and
+only the food moves. TabularModel enumerates the reachable states into
+arrays, and value_iteration/policy_iteration solve it.
+'''
+
+EAT_REWARD = 1.0
+DEATH_REWARD = -1.0
+LIVING_REWARD = 0.0
+
+'''
+Returns: the cells the food can respawn on, on the given setup.Board
+'''
+def food_cells(board):
+    return [(x, y) for x in range(1, board.rows) for y in range(1, board.cols)]
 
 
 class MDP:
@@ -57,12 +84,16 @@ class MDP:
 
 class Markov(MDP):
 
-    def __init__(self, game, starting_state):
+    '''
+    Input: game, the engine Game supplying get_new_state
+           starting_state, SnakeState to start from
+           max_length, longest body modelled (None models the whole snake)
+    '''
+    def __init__(self, game, starting_state, max_length=None):
         self.game = game
         self.starting_state = starting_state
-
-
-
+        self.max_length = max_length
+        self.food_cells = food_cells(game.board)
 
     def get_start_state(self):
         return self.starting_state
@@ -73,16 +104,222 @@ class Markov(MDP):
         possible = []
         for a in actions:
             successor = self.game.get_new_state(state, a)
-            if not successor['snake'].wall_collide() and not successor['snake'].body_collide():
+            if not successor.wall_collide() and not successor.body_collide():
                 possible.append(a)
         return possible
 
 
+    def get_transition_states_and_probs(self, state, action):
+        if self.is_terminal(state):
+            return []
+        eats = self.game.get_new_state(state, action).head == state.food
+        grow = eats and (self.max_length is None or state.length < self.max_length)
+        successor = state.step(action, grow)
+        if not eats or self.is_terminal(successor):
+            return [(successor, 1.0)]
+        cells = [pos for pos in self.food_cells if not successor.is_occupied(pos)]
+        if not cells:
+            # Nowhere left for the food: the game is won
+            return [(SnakeState(successor.body, None, successor.board), 1.0)]
+        prob = 1.0 / len(cells)
+        return [(SnakeState(successor.body, pos, successor.board), prob) for pos in cells]
 
 
+    def get_reward(self, state, action, nextState):
+        if nextState.wall_collide() or nextState.body_collide():
+            return DEATH_REWARD
+        if nextState.head == state.food:
+            return EAT_REWARD
+        return LIVING_REWARD
 
 
-
-
-
-
+    def is_terminal(self, state):
+        return state.food is None or state.wall_collide() or state.body_collide()
+
+
+# Largest state count whose transitions are stored as a dense matrix
+DENSE_LIMIT = 1000
+
+
+'''
+Enumerated, array-backed model of an MDP, built by a breadth-first sweep over
+the states reachable from the start states. Every terminal state is folded
+into index 0, an absorbing state with no transitions and value 0.
+Transitions are a dense (actions * states, states) matrix for small models
+and coordinate arrays, summed with np.bincount, for larger ones.
+Input: mdp, the MDP to enumerate
+       start_states, states to sweep from (default the MDP's start state)
+       dense_limit, largest state count stored densely
+'''
+class TabularModel:
+
+    def __init__(self, mdp, start_states=None, dense_limit=DENSE_LIMIT):
+        if start_states is None:
+            start_states = [mdp.get_start_state()]
+        self.actions = get_moves()
+        self.states = [None]
+        self.index = {}
+        queue = deque()
+        for state in start_states:
+            if not mdp.is_terminal(state) and state not in self.index:
+                self.index[state] = len(self.states)
+                self.states.append(state)
+                queue.append(state)
+
+        pairs, cols, probs, rewards = [], [], [], []
+        while queue:
+            state = queue.popleft()
+            s = self.index[state]
+            for a, action in enumerate(self.actions):
+                for successor, prob in mdp.get_transition_states_and_probs(state, action):
+                    if mdp.is_terminal(successor):
+                        t = 0
+                    else:
+                        t = self.index.get(successor)
+                        if t is None:
+                            t = self.index[successor] = len(self.states)
+                            self.states.append(successor)
+                            queue.append(successor)
+                    pairs.append((a, s))
+                    cols.append(t)
+                    probs.append(prob)
+                    rewards.append(prob * mdp.get_reward(state, action, successor))
+
+        self.num_states = len(self.states)
+        shape = (len(self.actions), self.num_states)
+        pairs = np.array(pairs, dtype=np.int64).reshape(-1, 2)
+        # Row of each transition in the flattened (action, state) table
+        self.rows = pairs[:, 0] * self.num_states + pairs[:, 1]
+        self.cols = np.array(cols, dtype=np.int64)
+        self.probs = np.array(probs)
+        # Expected immediate reward of every (action, state)
+        self.rewards = np.bincount(self.rows, weights=np.array(rewards),
+                                   minlength=shape[0] * shape[1]).reshape(shape)
+        self.dense = None
+        if self.num_states <= dense_limit:
+            self.dense = np.zeros((shape[0] * shape[1], self.num_states))
+            np.add.at(self.dense, (self.rows, self.cols), self.probs)
+
+    '''
+    One Bellman backup of the given state values
+    Returns: (actions, states) array of Q(s, a) = R(s, a) + discount * E[V(s')]
+    '''
+    def q_values(self, values, discount):
+        if self.dense is not None:
+            expected = self.dense @ values
+        else:
+            expected = np.bincount(self.rows, weights=self.probs * values[self.cols],
+                                   minlength=self.rewards.size)
+        return self.rewards + discount * expected.reshape(self.rewards.shape)
+
+
+'''
+Input: model, a TabularModel
+       discount, discount factor
+       epsilon, stop once no value changes by more than this
+Returns: (values, policy), arrays over the model's states; policy holds action indices
+'''
+def value_iteration(model, discount=0.95, epsilon=1e-6, max_iterations=10000):
+    values = np.zeros(model.num_states)
+    for _ in range(max_iterations):
+        new_values = model.q_values(values, discount).max(axis=0)
+        delta = np.abs(new_values - values).max()
+        values = new_values
+        if delta < epsilon:
+            break
+    return values, model.q_values(values, discount).argmax(axis=0)
+
+
+'''
+Input: model, a TabularModel
+       discount, discount factor
+       sweeps, Bellman sweeps per policy evaluation of a sparse model;
+           dense models are evaluated exactly with a linear solve
+Returns: (values, policy), arrays over the model's states; policy holds action indices
+'''
+def policy_iteration(model, discount=0.95, sweeps=50, max_iterations=1000):
+    states = np.arange(model.num_states)
+    policy = np.zeros(model.num_states, dtype=np.int64)
+    values = np.zeros(model.num_states)
+    for _ in range(max_iterations):
+        if model.dense is not None:
+            transitions = model.dense.reshape(len(model.actions), model.num_states, -1)[policy, states]
+            rewards = model.rewards[policy, states]
+            values = np.linalg.solve(np.eye(model.num_states) - discount * transitions, rewards)
+        else:
+            for _ in range(sweeps):
+                values = model.q_values(values, discount)[policy, states]
+        new_policy = model.q_values(values, discount).argmax(axis=0)
+        if np.array_equal(new_policy, policy):
+            break
+        policy = new_policy
+    return values, policy
+
+
+'''
+Plays a solved policy, called like the functions in search.py.
+The policy covers the first max_length segments of the snake, so a move is a
+dictionary lookup of the head segments and the food, then a check of at most
+four actions (best Q value first) against the real body. A model is solved
+the first time each board is played, by warm_up() (which the drivers call
+before timing any turn) or else by the first call; the state count grows
+with the square of the board's area, so this suits small boards.
+Input: max_length, body segments the MDP models
+       discount, discount factor
+       solver, value_iteration or policy_iteration
+'''
+class MDPAgent:
+
+    def __init__(self, max_length=2, discount=0.95, solver=value_iteration):
+        self.__name__ = "mdp_policy"
+        self.max_length = max_length
+        self.discount = discount
+        self.solver = solver
+        # setup.Board -> (TabularModel, Q-values)
+        self.models = {}
+
+    '''
+    Enumerates and solves the capped MDP from every opening food position
+    Returns: (TabularModel, Q-values) of the game's board
+    '''
+    def solve(self, game):
+        board = game.board
+        start = (board.start_pos,)
+        starts = [SnakeState(start, pos, board) for pos in food_cells(board) if pos != board.start_pos]
+        markov = Markov(game, starts[0], self.max_length)
+        model = TabularModel(markov, starts)
+        values, _ = self.solver(model, self.discount)
+        self.models[board] = (model, model.q_values(values, self.discount))
+        return self.models[board]
+
+    '''
+    Solves the model of the game's board ahead of the first turn
+    '''
+    def warm_up(self, game):
+        if game.board not in self.models:
+            self.solve(game)
+
+    '''
+    Input: search problem, heuristic (unused), optional util.SearchStats
+    Returns: search path of a single action
+    '''
+    def __call__(self, problem, heuristic=None, stats=None):
+        state = problem.get_start_state()
+        if state.board not in self.models:
+            self.solve(problem.game)
+        model, q = self.models[state.board]
+        s = model.index.get(SnakeState(state.body[:self.max_length], state.food, state.board))
+        if s is not None:
+            for a in np.argsort(-q[:, s]):
+                action = model.actions[a]
+                successor = state.step(action)
+                if not successor.wall_collide() and not successor.body_collide():
+                    if stats is not None:
+                        stats.expanded += 1
+                    return [action]
+        if stats is not None:
+            stats.failsafe = True
+        return failsafe(problem, state)
+
+
+mdp_policy = MDPAgent()
@@ -0,0 +1,268 @@
+import argparse
+import multiprocessing
+import numpy as np
+from batchsim import BatchSnakeEnv, MOVES, DX, DY
+from mdp import EAT_REWARD, DEATH_REWARD, LIVING_REWARD
+from search import failsafe
+from setup import *
+from snakestate import in_bounds
+
+'''
+Tabular Q-learning and SARSA over a compact encoding of the snake state:
+    danger, whether each of the four moves dies at once (4 bits)
+    local occupancy, whether each diagonal neighbour of the head is
+        blocked by a wall or the body (4 bits)
+    food direction, the sign of the food's offset from the head on each axis (9 values)
+The Q-table is a (NUM_FEATURES, actions) NumPy array indexed by that encoding.
+Training rolls out many headless games at once in batchsim.BatchSnakeEnv and
+updates the table with vectorized backups; workers train copies of the table
+in parallel and are merged by visit-weighted averaging.
+'''
+
+DIAG_X = np.array([-1, -1, 1, 1])
+DIAG_Y = np.array([-1, 1, -1, 1])
+DIAGONALS = list(zip(DIAG_X.tolist(), DIAG_Y.tolist()))
+BITS = 1 << np.arange(4)
+NUM_FEATURES = 16 * 16 * 9
+
+
+def encode(danger, near, food_dx, food_dy):
+    return (danger * 16 + near) * 9 + (food_dx + 1) * 3 + (food_dy + 1)
+
+
+def _blocked(env, games, nx, ny, tail=None):
+    inside = (nx >= 0) & (nx < env.rows) & (ny >= 0) & (ny < env.cols)
+    cell = np.where(inside, nx * env.cols + ny, 0)
+    occupied = env.occupied[games[:, None], cell]
+    if tail is not None:
+        # The tail moves out of the way on the same turn
+        occupied &= cell != tail[:, None]
+    return ~inside | occupied
+
+
+'''
+Returns: (N,) feature index of every game in a BatchSnakeEnv
+'''
+def batch_features(env):
+    games = np.arange(env.n)
+    x, y = np.divmod(env.heads(), env.cols)
+    tail = env.ring[games, (env.head_ptr - env.length + 1) % env.cells]
+    danger = _blocked(env, games, x[:, None] + DX, y[:, None] + DY, tail) @ BITS
+    near = _blocked(env, games, x[:, None] + DIAG_X, y[:, None] + DIAG_Y) @ BITS
+    food_x, food_y = np.divmod(env.food, env.cols)
+    return encode(danger, near, np.sign(food_x - x), np.sign(food_y - y))
+
+
+'''
+Returns: feature index of a SnakeState, the same encoding as batch_features
+'''
+def state_features(state):
+    x, y = state.head
+    danger = 0
+    for i, action in enumerate(MOVES):
+        successor = state.step(action)
+        if successor.wall_collide() or successor.body_collide():
+            danger |= 1 << i
+    near = 0
+    for i, (dx, dy) in enumerate(DIAGONALS):
+        pos = (x + dx, y + dy)
+        if not in_bounds(pos, state.board) or state.is_occupied(pos):
+            near |= 1 << i
+    food_x, food_y = state.food
+    return encode(danger, near, (food_x > x) - (food_x < x), (food_y > y) - (food_y < y))
+
+
+class QLearner:
+
+    '''
+    Input: q, initial Q-table (default all zeros)
+           alpha, learning rate
+           discount, discount factor
+           epsilon, exploration rate of the epsilon-greedy behaviour policy
+           sarsa, back up the action actually taken next instead of the best one
+           games, number of games rolled out in lockstep
+           board, the setup.Board the games are played on
+           starvation, steps without food after which a game counts as lost,
+               so the learned policy cannot settle into a loop (default
+               twice the number of cells)
+           seed, seeds the environment and the exploration
+    '''
+    def __init__(self, q=None, alpha=0.1, discount=0.9, epsilon=0.1, sarsa=False,
+                 games=256, board=DEFAULT_BOARD, starvation=None, seed=None):
+        self.q = np.zeros((NUM_FEATURES, len(MOVES))) if q is None else q.copy()
+        self.visits = np.zeros(self.q.shape, dtype=np.int64)
+        self.alpha = alpha
+        self.discount = discount
+        self.epsilon = epsilon
+        self.sarsa = sarsa
+        self.starvation = starvation if starvation is not None else board.cells * 2
+        self.rng = np.random.default_rng(seed)
+        self.env = BatchSnakeEnv(games, board, seed=self.rng.integers(1 << 32))
+        self.hunger = np.zeros(games, dtype=np.int64)
+
+    def choose(self, features):
+        greedy = self.q[features].argmax(axis=1)
+        explore = self.rng.random(len(features)) < self.epsilon
+        return np.where(explore, self.rng.integers(len(MOVES), size=len(features)), greedy)
+
+    '''
+    Runs the given number of lockstep steps, updating the Q-table after each
+    Returns: the Q-table
+    '''
+    def train(self, steps):
+        env = self.env
+        features = batch_features(env)
+        actions = self.choose(features)
+        for _ in range(steps):
+            ate, died = env.step(actions)
+            self.hunger += 1
+            self.hunger[ate | died] = 0
+            starved = self.hunger > self.starvation
+            if starved.any():
+                env.reset(starved)
+                self.hunger[starved] = 0
+            lost = died | starved
+
+            reward = np.where(ate, EAT_REWARD, LIVING_REWARD)
+            reward = np.where(lost, DEATH_REWARD, reward)
+            next_features = batch_features(env)
+            next_actions = self.choose(next_features)
+            if self.sarsa:
+                future = self.q[next_features, next_actions]
+            else:
+                future = self.q[next_features].max(axis=1)
+            # Lost games were reset, so their next features belong to a new game
+            target = reward + self.discount * np.where(lost, 0.0, future)
+            error = target - self.q[features, actions]
+            # Games sharing a (features, action) pair make one update with their mean error,
+            # so a step moves an entry by at most alpha however many games visit it
+            pair = features * len(MOVES) + actions
+            counts = np.bincount(pair, minlength=self.q.size)
+            total = np.bincount(pair, weights=error, minlength=self.q.size)
+            seen = counts > 0
+            self.q.flat[seen] += self.alpha * total[seen] / counts[seen]
+            self.visits.flat[seen] += counts[seen]
+            features, actions = next_features, next_actions
+        return self.q
+
+
+'''
+Worker entry point for train_parallel
+Input: job, (Q-table, seed, steps, QLearner keyword arguments)
+Returns: (trained Q-table, visit counts)
+'''
+def train_job(job):
+    q, seed, steps, options = job
+    learner = QLearner(q, seed=seed, **options)
+    learner.train(steps)
+    return learner.q, learner.visits
+
+
+'''
+Trains copies of the table in separate processes and merges them every round,
+weighting each worker's values by how often it visited the entry
+Input: workers, number of processes
+       rounds, number of train-and-merge rounds
+       steps, lockstep steps per worker per round
+       seed, worker w in round r is seeded with seed + r * workers + w
+       options, passed on to QLearner
+Returns: the merged Q-table
+'''
+def train_parallel(workers=4, rounds=10, steps=2000, seed=0, **options):
+    q = np.zeros((NUM_FEATURES, len(MOVES)))
+    with multiprocessing.Pool(workers) as pool:
+        for r in range(rounds):
+            jobs = [(q, seed + r * workers + w, steps, options) for w in range(workers)]
+            results = pool.map(train_job, jobs)
+            visits = sum(result[1] for result in results)
+            merged = sum(result[0] * result[1] for result in results)
+            q = np.where(visits > 0, merged / np.maximum(visits, 1), q)
+    return q
+
+
+'''
+Plays a Q-table greedily, called like the functions in search.py.
+A move is one feature encoding and one row lookup, tens of microseconds.
+The features do not depend on the board size, so one table plays any board.
+The encoding has no memory, so a greedy policy can circle forever; after
+starvation moves without the food changing the agent moves at random
+(search.failsafe) until it does.
+Input: q, a trained Q-table, or None to train one on the first board played
+           (in warm_up(), which the drivers call before timing any turn)
+       steps, lockstep steps of single-process training when q is None
+       seed, seeds that training
+       starvation, moves allowed per food before falling back to random moves
+           (default twice the number of cells)
+'''
+class QAgent:
+
+    def __init__(self, q=None, steps=3000, seed=0, starvation=None):
+        self.__name__ = "q_policy"
+        self.q = q
+        self.steps = steps
+        self.seed = seed
+        self.starvation = starvation
+        self.food = None
+        self.hunger = 0
+
+    '''
+    Trains the table, if there is none yet, ahead of the first turn
+    '''
+    def warm_up(self, game):
+        if self.q is None:
+            self.q = QLearner(board=game.board, seed=self.seed).train(self.steps)
+
+    '''
+    Input: search problem, heuristic (unused), optional util.SearchStats
+    Returns: search path of a single action
+    '''
+    def __call__(self, problem, heuristic=None, stats=None):
+        if self.q is None:
+            self.warm_up(problem.game)
+        state = problem.get_start_state()
+        if state.food != self.food:
+            self.food = state.food
+            self.hunger = 0
+        self.hunger += 1
+        starvation = self.starvation if self.starvation is not None else state.board.cells * 2
+        action = MOVES[self.q[state_features(state)].argmax()]
+        successor = state.step(action)
+        # Deadly moves only come from entries the table never learned
+        if self.hunger > starvation or successor.wall_collide() or successor.body_collide():
+            if stats is not None:
+                stats.failsafe = True
+            return failsafe(problem, state)
+        if stats is not None:
+            stats.expanded += 1
+        return [action]
+
+
+def save(q, filename):
+    np.save(filename, q)
+
+
+def load(filename):
+    return np.load(filename)
+
+
+q_policy = QAgent()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Train a tabular Q-learning snake policy.")
+    parser.add_argument('--workers', type=int, default=1, help="training processes")
+    parser.add_argument('--rounds', type=int, default=10, help="train-and-merge rounds")
+    parser.add_argument('--steps', type=int, default=2000, help="lockstep steps per worker per round")
+    parser.add_argument('--sarsa', action='store_true', help="use SARSA instead of Q-learning")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--rows', type=int, default=ROWS, help="board rows")
+    parser.add_argument('--cols', type=int, default=COLS, help="board columns")
+    parser.add_argument('--output', default="data/qtable.npy", help="where to save the table")
+    args = parser.parse_args()
+    board = Board(args.rows, args.cols)
+    if args.workers > 1:
+        table = train_parallel(args.workers, args.rounds, args.steps, args.seed, sarsa=args.sarsa, board=board)
+    else:
+        table = QLearner(sarsa=args.sarsa, board=board, seed=args.seed).train(args.rounds * args.steps)
+    save(table, args.output)
+    print("Saved Q-table to " + args.output)
@@ -0,0 +1,300 @@
+import argparse
+import contextlib
+import io
+import json
+import math
+import multiprocessing
+import random
+import time
+import tracemalloc
+import searchproblem
+import util
+from benchmark import ALGORITHMS, algorithm_name
+from engine import Game, Snake
+from setup import *
+
+'''
+Scaling benchmarks: every ALGORITHMS entry is played on a sweep of board sizes
+and starting snake lengths, recording per-plan latency, nodes expanded and
+peak traced memory. Each configuration runs in its own process under a wall
+clock budget; a configuration that times out, raises or whose p90 plan
+latency is over the limit has fallen over, and larger boards are skipped for
+that algorithm and length.
+
+Each game is played twice with the same seed, so both passes make the same
+plans: first instrumented (util.SearchStats, and tracemalloc when memory is
+on), then untouched for the latencies. One-off setup done on the first call,
+such as solving the MDP or training the Q-table, therefore shows up in peak
+memory but not in the latencies.
+
+Results go to a JSON lines table, one record per configuration, and a text
+summary fitting each algorithm's growth in the number of cells.
+'''
+
+SIZES = [10, 20, 40, 80]
+LENGTHS = [1, 10, 40]
+
+
+'''
+Lays a starting body of the given length along a boustrophedon path through
+the board, head on the start position. Agents that need the body laid out
+their own way (hamiltonian.HamiltonianAgent) have an initial_body method
+used instead.
+Returns: list of cells from head to tail
+'''
+def initial_body(board, length):
+    path = []
+    for x in range(board.rows):
+        ys = range(board.cols) if x % 2 == 0 else range(board.cols - 1, -1, -1)
+        path.extend((x, y) for y in ys)
+    p = path.index(board.start_pos)
+    if p + 1 >= length:
+        return path[p - length + 1:p + 1][::-1]
+    if p + length <= len(path):
+        return path[p:p + length]
+    raise ValueError("A snake of length " + str(length) + " does not fit on " + repr(board))
+
+
+'''
+Plays one game for at most max_plans plans
+Input: profile, count nodes with a util.SearchStats (and trace memory if
+           tracemalloc is running) instead of timing the plans
+Returns: (list of per-plan dicts, final score)
+'''
+def play(function, heuristic, board, length, seed, max_plans, profile):
+    body = getattr(function, 'initial_body', initial_body)(board, length)
+    game = Game(Snake(body[0], board, body), random.Random(seed))
+    plans = []
+    while len(plans) < max_plans:
+        problem = searchproblem.SimpleSearchProblem(game, game.get_state())
+        if profile:
+            stats = util.SearchStats()
+            tracing = tracemalloc.is_tracing()
+            if tracing:
+                tracemalloc.reset_peak()
+                base = tracemalloc.get_traced_memory()[0]
+            moves = function(problem, heuristic, stats=stats)
+            plan = {'expanded': stats.expanded}
+            if tracing:
+                plan['peak'] = tracemalloc.get_traced_memory()[1] - base
+        else:
+            start = time.perf_counter()
+            moves = function(problem, heuristic)
+            plan = {'time': time.perf_counter() - start}
+        plans.append(plan)
+        # Planners without a fallback give up with no plan
+        if not moves:
+            break
+        for move in moves:
+            if game.advance(move):
+                return plans, game.score
+    return plans, game.score
+
+
+'''
+Returns: the q-th percentile (0-100) of the values, interpolating between ranks
+'''
+def percentile(values, q):
+    values = sorted(values)
+    if not values:
+        return None
+    rank = (len(values) - 1) * q / 100.0
+    low = int(math.floor(rank))
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (rank - low)
+
+
+def config_record(i, board, length):
+    return {'algorithm': algorithm_name(ALGORITHMS[i]),
+            'heuristic': ALGORITHMS[i][1].__name__,
+            'rows': board.rows,
+            'cols': board.cols,
+            'cells': board.cells,
+            'length': length,
+            'fell_over': False,
+            'reason': None}
+
+
+'''
+Worker entry point: measures one configuration
+Input: job, (index into ALGORITHMS, rows, cols, length, seeds, max_plans, memory)
+Returns: the configuration's record
+'''
+def measure(job):
+    i, rows, cols, length, seeds, max_plans, memory = job
+    function, heuristic = ALGORITHMS[i][0], ALGORITHMS[i][1]
+    board = Board(rows, cols)
+    record = config_record(i, board, length)
+    profiles, timings, scores = [], [], []
+    # The planners print progress and fallbacks; keep the worker quiet
+    with contextlib.redirect_stdout(io.StringIO()):
+        if memory:
+            tracemalloc.start()
+        for seed in seeds:
+            profiles.extend(play(function, heuristic, board, length, seed, max_plans, True)[0])
+        if memory:
+            tracemalloc.stop()
+        for seed in seeds:
+            plans, score = play(function, heuristic, board, length, seed, max_plans, False)
+            timings.extend(plans)
+            scores.append(score)
+
+    latencies = [plan['time'] for plan in timings]
+    expanded = [plan['expanded'] for plan in profiles]
+    record.update({'games': len(seeds),
+                   'plans': len(timings),
+                   'score_mean': sum(scores) / len(scores),
+                   'latency_p50': percentile(latencies, 50),
+                   'latency_p90': percentile(latencies, 90),
+                   'latency_p99': percentile(latencies, 99),
+                   'latency_max': max(latencies),
+                   'expanded_mean': sum(expanded) / len(expanded),
+                   'expanded_p50': percentile(expanded, 50),
+                   'expanded_max': max(expanded)})
+    if memory:
+        peaks = [plan['peak'] / 1024.0 for plan in profiles]
+        record['peak_kib_p50'] = percentile(peaks, 50)
+        record['peak_kib_max'] = max(peaks)
+    return record
+
+
+'''
+Runs one configuration in a fresh process, killing it once budget seconds pass
+Returns: the configuration's record, marked fell_over if it did not finish in time,
+         raised, or had a p90 plan latency over max_latency seconds
+'''
+def run_config(job, budget, max_latency):
+    i, rows, cols, length = job[:4]
+    pool = multiprocessing.Pool(1)
+    try:
+        record = pool.apply_async(measure, (job,)).get(budget)
+        if record['latency_p90'] > max_latency:
+            record['fell_over'] = True
+            record['reason'] = "p90 latency over " + str(max_latency) + "s"
+    except multiprocessing.TimeoutError:
+        record = config_record(i, Board(rows, cols), length)
+        record['fell_over'] = True
+        record['reason'] = "over the " + str(budget) + "s budget"
+    except Exception as error:
+        record = config_record(i, Board(rows, cols), length)
+        record['fell_over'] = True
+        record['reason'] = type(error).__name__ + ": " + str(error)
+    finally:
+        pool.terminate()
+        pool.join()
+    return record
+
+
+'''
+Input: algorithms, indices into ALGORITHMS (default all of them)
+       sizes, side lengths of the square boards, smallest first
+       lengths, starting snake lengths
+       games, seeded games per configuration (seeds 0 .. games - 1)
+       max_plans, plans per game
+       budget, wall clock seconds per configuration
+       max_latency, p90 plan latency in seconds above which an algorithm has fallen over
+       memory, trace peak memory per plan with tracemalloc
+       output, JSON lines table to write
+Returns: list of configuration records
+'''
+def run_suite(algorithms=None, sizes=SIZES, lengths=LENGTHS, games=2, max_plans=30, budget=60,
+              max_latency=1.0, memory=True, output="data/scaling.jsonl"):
+    if algorithms is None:
+        algorithms = range(len(ALGORITHMS))
+    records = []
+    table = open(output, 'w')
+    for i in algorithms:
+        for length in lengths:
+            fell_over_at = None
+            for size in sizes:
+                if length > size * size // 2:
+                    continue
+                if fell_over_at is not None:
+                    record = config_record(i, Board(size, size), length)
+                    record['fell_over'] = True
+                    record['reason'] = "skipped, fell over at " + fell_over_at
+                else:
+                    print("Measuring " + algorithm_name(ALGORITHMS[i]) + " on " + str(size) + "x" + str(size)
+                          + ", length " + str(length))
+                    job = (i, size, size, length, list(range(games)), max_plans, memory)
+                    record = run_config(job, budget, max_latency)
+                    if record['fell_over']:
+                        fell_over_at = str(size) + "x" + str(size)
+                table.write(json.dumps(record) + "\n")
+                table.flush()
+                records.append(record)
+    table.close()
+    return records
+
+
+'''
+Least-squares slope of log(y) against log(x): y grows like x to this power
+Returns: the exponent, or None with fewer than two positive points
+'''
+def growth_exponent(xs, ys):
+    points = [(math.log(x), math.log(y)) for x, y in zip(xs, ys) if x > 0 and y is not None and y > 0]
+    if len(points) < 2:
+        return None
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    spread = sum((x - mean_x) ** 2 for x, _ in points)
+    if spread == 0:
+        return None
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / spread
+
+
+def format_exponent(exponent):
+    return "n/a" if exponent is None else "cells^" + format(exponent, ".2f")
+
+
+'''
+Returns: text summary of each algorithm's growth curve per starting length
+'''
+def growth_summary(records):
+    lines = []
+    groups = {}
+    for record in records:
+        groups.setdefault((record['algorithm'], record['length']), []).append(record)
+    for (algorithm, length), group in groups.items():
+        done = [record for record in group if not record['fell_over']]
+        fallen = [record for record in group if record['fell_over']]
+        cells = [record['cells'] for record in done]
+        line = algorithm + ", length " + str(length) + ": "
+        line += "p50 latency ~ " + format_exponent(growth_exponent(cells, [r['latency_p50'] for r in done]))
+        line += ", expanded ~ " + format_exponent(growth_exponent(cells, [r['expanded_mean'] for r in done]))
+        if done and 'peak_kib_p50' in done[0]:
+            line += ", peak memory ~ " + format_exponent(growth_exponent(cells, [r['peak_kib_p50'] for r in done]))
+        if done:
+            largest = done[-1]
+            line += "; fine up to " + str(largest['rows']) + "x" + str(largest['cols'])
+            line += " (p50 " + format(largest['latency_p50'] * 1000, ".2f") + " ms)"
+        if fallen:
+            line += "; falls over at " + str(fallen[0]['rows']) + "x" + str(fallen[0]['cols'])
+            line += " (" + fallen[0]['reason'] + ")"
+        lines.append(line)
+    return "\n".join(lines) + "\n"
+
+
+if __name__ == '__main__':
+    names = [algorithm_name(entry) for entry in ALGORITHMS]
+    parser = argparse.ArgumentParser(description="Sweep board sizes and snake lengths over the algorithms")
+    parser.add_argument("--algorithms", nargs="+", choices=names, default=names, metavar="NAME",
+                        help="algorithms to measure: " + ", ".join(names))
+    parser.add_argument("--sizes", nargs="+", type=int, default=SIZES, help="square board sides, smallest first")
+    parser.add_argument("--lengths", nargs="+", type=int, default=LENGTHS, help="starting snake lengths")
+    parser.add_argument("--games", type=int, default=2, help="seeded games per configuration")
+    parser.add_argument("--plans", type=int, default=30, help="plans per game")
+    parser.add_argument("--budget", type=float, default=60, help="wall clock seconds per configuration")
+    parser.add_argument("--max-latency", type=float, default=1.0,
+                        help="p90 plan latency in seconds above which an algorithm has fallen over")
+    parser.add_argument("--no-memory", action="store_true", help="skip tracemalloc peak memory tracing")
+    parser.add_argument("--output", default="data/scaling.jsonl", help="JSON lines table to write")
+    args = parser.parse_args()
+
+    results = run_suite([names.index(name) for name in args.algorithms], sorted(args.sizes), args.lengths,
+                        args.games, args.plans, args.budget, args.max_latency, not args.no_memory, args.output)
+    summary = growth_summary(results)
+    summary_file = open(args.output.rsplit('.', 1)[0] + "_summary.txt", 'w')
+    summary_file.write(summary)
+    summary_file.close()
+    print(summary)
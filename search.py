@@ -1,647 +1,306 @@
+import searchproblem
 import util
 from setup import *
-import random
 
 
 '''
-Searchest the deepest nodes in the search tree first
-Input: search problem
-Returns: search path, a sequence of actions
+Search tree node. A node keeps its parent and the action that reached it
+instead of a copy of the whole path, so generating one is O(1); the path is
+rebuilt once, by walking back from the goal.
 '''
-def dfs(problem, heuristic=None):
-    # Initialize problem, pushing first node to frontier
-    initial_node = (problem.get_start_state(), [])
-    frontier = util.Stack()
-    frontier.push(initial_node)
-    explored = []
-    most_recent_node = initial_node
-
-    while not frontier.isEmpty():
-        current_node = frontier.pop()
-        most_recent_node = current_node
-        current_node_state = current_node[0]
-        current_node_path = current_node[1]
-        explored.append(current_node_state)
-
-        if problem.is_goal_state(current_node_state):
-            return current_node_path
+class Node:
 
-        for successor in problem.get_successors(current_node_state):
-            action = successor[1]
-            next_state = successor[0]
+    __slots__ = ('state', 'parent', 'action', 'cost', 'depth')
 
-            # Infinite loop from successor way out of bounds, do not add these to the frontier
-            # head_x = successor[0]['snake'].head.pos[0]
-            # head_y = successor[0]['snake'].head.pos[1]
-            # if not (head_x < 0 or head_x > ROWS - 1 or head_y < 0 or head_y > COLS - 1):
+    def __init__(self, state, parent=None, action=None, cost=0):
+        self.state = state
+        self.parent = parent
+        self.action = action
+        self.cost = cost
+        self.depth = parent.depth + 1 if parent is not None else 0
 
-            if next_state not in explored:
-                # Check if the frontier contains a node with the nextState
-                # If so, remove from the frontier
-                # Maintain temp stack to hold items popped from frontier
-                # Push items from temp stack back onto frontier
-
-                temp_stack = util.Stack()
-                while not frontier.isEmpty():
-                    current = frontier.pop()
-                    #if current[0] == next_state:
-                    if current[0]['snake'].head.pos == next_state['snake'].head.pos:
-                        break
-                    temp_stack.push(current)
-                while not temp_stack.isEmpty():
-                    frontier.push(temp_stack.pop())
-                print("Appending to frontier: " + "(" + str(next_state['snake'].head.pos[0]) + "," + str(next_state['snake'].head.pos[1]) + ")")
-                frontier.push((next_state, current_node_path + [action]))
-    try:
-        print("failsafe")
-        successor_list = problem.get_better_successors(most_recent_node[0])
+    '''
+    Returns: the actions leading from the root to this node
+    '''
+    def path(self):
         actions = []
-        for successor in successor_list:
-            actions.append(successor[1])
-        return [random.choice(actions)]
-    except IndexError:
-        # Arbitrarily return left if get better successors was an empty list
-        return [util.Action.LEFT]
-
-
-def dls(problem, heuristic=None):
-    cutoff = (ROWS + COLS) * 2
-    initial_node = (problem.get_start_state(), [])
-    frontier = util.Stack()
-    frontier.push(initial_node)
-    explored = []
-    # Memory of the last valid node for the cutoff return
-    most_recent_node = initial_node
-    while True:
-        # Fail if frontier is empty
-        if frontier.isEmpty():
-            print("DFS cutoff was reached.")
-            try:
-                successor_list = problem.get_better_successors(most_recent_node[0])
-                actions = []
-                for successor in successor_list:
-                    actions.append(successor[1])
-                return [random.choice(actions)]
-            except IndexError:
-                # Arbitrarily return left if get better successors was an empty list
-                return [util.Action.LEFT]
-        # Remove the last node from the frontier
-        current_node = frontier.pop()
-        most_recent_node = current_node
-        # Add that node to the explored set
-        explored.append(current_node[0]['snake'].head.pos)
-        # Check if the goal state has been reached, if so return path
-        if problem.is_goal_state(current_node[0]) is True:
-            # List of the directions chosen is returned
-            return current_node[1]
-
-        if len(current_node[1]) <= cutoff:
-
-            # Otherwise, find all successors and update frontier
-            successors = problem.get_better_successors(current_node[0])
-            for node in successors:
-                if node[0]['snake'].head.pos not in explored:
-                    # Check that the node is not in the frontier using temp stack
-                    bounce = util.Stack()
-                    while not frontier.isEmpty():
-                        move_node = frontier.pop()
-                        if (move_node[0]['snake'].head.pos == current_node[0]['snake'].head.pos):
-                            # Discard move_node, it will be replaced later
-                            pass
-                        # Otherwise keep looking
-                        else:
-                            bounce.push(move_node)
-                    # Push all items from temp stack back into frontier
-                    while not bounce.isEmpty():
-                        go_back = bounce.pop()
-                        frontier.push(go_back)
-
-                    # Add (or replace) the node to the frontier
-                    frontier.push((node[0], current_node[1] + [node[1]]))
+        node = self
+        while node.parent is not None:
+            actions.append(node.action)
+            node = node.parent
+        actions.reverse()
+        return actions
 
 
 '''
-Search the shallowest nodes in the search tree first
-Input: search problem
+Graph search shared by every algorithm below.
+Input: problem, the search problem
+       frontier, a util.Stack, util.Queue or util.PriorityQueue; its update()
+           decides what happens to a node whose frontier key is already queued
+       priority, function of (node, heuristic) giving the node's frontier
+           priority (None if the frontier is unordered)
+       heuristic, heuristic function of a state, passed on to priority
+       successors, successor function of the problem (default get_successors)
+       fallback, function of (problem, state) called with the last expanded
+           state if the frontier runs dry (None returns None)
+       depth_limit, nodes deeper than this are not expanded
+       stats, a util.SearchStats to fill in, or None to run uninstrumented
+If the problem has a util.SearchBudget, the search stops once it runs out and
+returns the path to the expanded node closest to the goal by the heuristic
+(Manhattan distance for uninformed searches), or failsafe's single safe move;
+a budgeted search whose frontier runs dry also falls back to failsafe.
 Returns: search path, a sequence of actions
 '''
-def bfs(problem, heuristic=None):
-    # Initialize problem, pushing first node to frontier
-    initial_node = (problem.get_start_state(), [])
-    frontier = util.Queue()
-    frontier.push(initial_node)
-    explored = []
-
-    while not frontier.isEmpty():
-        current_node = frontier.pop()
-        current_node_state = current_node[0]
-        current_node_path = current_node[1]
-        explored.append(current_node_state)
-
-        if problem.is_goal_state(current_node_state):
-            return current_node_path
-
-        for successor in problem.get_successors(current_node_state):
-
-            action = successor[1]
-            next_state = successor[0]
-
-            if next_state not in explored:
-
-                # Check if the frontier contains a node with the next state
-                # If so, set boolean which prevents adding to frontier
-                # Maintain temp queue to hold items popped from frontier
-                # Push items from temp queue back onto frontier
-
-                frontier_contains_next_state = False
-                temp_queue = util.Queue()
-
-                while not frontier.isEmpty():
-                    current = frontier.pop()
-                    if current[0]['snake'].head.pos == next_state['snake'].head.pos:
-                        frontier_contains_next_state = True
-
-                    temp_queue.push(current)
-
-                while not temp_queue.isEmpty():
-                    frontier.push(temp_queue.pop())
-
-                if not frontier_contains_next_state:
-                    frontier.push((next_state, current_node_path + [action]))
-
-
-def bfs_plus(problem, heuristic=None):
-    # Initialize problem, pushing first node to frontier
-    initial_node = (problem.get_start_state(), [])
-    frontier = util.Queue()
-    frontier.push(initial_node)
-    explored = []
+def graph_search(problem, frontier, priority=None, heuristic=None, successors=None,
+                 fallback=None, depth_limit=None, stats=None):
+    if successors is None:
+        successors = problem.get_successors
+    budget = problem.budget
+    if budget is not None:
+        # Started first, so heuristic preparation counts against the budget too
+        budget.start()
+    # Heuristics that precompute per planning call (e.g. util.foodDistanceHeuristic)
+    prepare = getattr(heuristic, 'prepare', None)
+    if prepare is not None:
+        prepare(problem.get_start_state())
+    if stats is not None:
+        cache_info = getattr(heuristic, 'cache_info', None)
+        # Only instrumented searches pay for the timing wrappers
+        successors = stats.timed_successors(successors)
+        if heuristic is not None:
+            heuristic = stats.timed_heuristic(heuristic)
+        frontier = util.InstrumentedFrontier(frontier, stats)
+    frontier_key = problem.frontier_key
+    if budget is not None:
+        if fallback is None:
+            fallback = failsafe
+        # Partial plans are ranked by the heuristic, uninformed searches by distance to the food
+        estimate = heuristic if heuristic is not None else util.manhattanDistance
+        best_node = None
+        best_score = None
+        expansions = 0
+
+    initial_node = Node(problem.get_start_state())
+    frontier.update(initial_node, priority(initial_node, heuristic) if priority else 0,
+                    frontier_key(initial_node.state))
+    # Closed set of states, which hash and compare on their canonical key
+    explored = set()
     most_recent_node = initial_node
+    path = None
 
     while not frontier.isEmpty():
+        if budget is not None and budget.expired(expansions):
+            break
         current_node = frontier.pop()
         most_recent_node = current_node
-        current_node_state = current_node[0]
-        current_node_path = current_node[1]
-        explored.append(current_node_state)
+        current_node_state = current_node.state
+        explored.add(current_node_state)
 
         if problem.is_goal_state(current_node_state):
-            return current_node_path
+            path = current_node.path()
+            break
 
-        for successor in problem.get_better_successors(current_node_state):
+        if budget is not None:
+            expansions += 1
+            if current_node.parent is not None:
+                score = (estimate(current_node_state), current_node.cost)
+                if (best_score is None or score < best_score) and survives(problem, current_node):
+                    best_node, best_score = current_node, score
 
-            action = successor[1]
-            next_state = successor[0]
+        if depth_limit is not None and current_node.depth > depth_limit:
+            continue
 
+        for next_state, action, step_cost in successors(current_node_state):
             if next_state not in explored:
+                next_node = Node(next_state, current_node, action, current_node.cost + step_cost)
+                frontier.update(next_node, priority(next_node, heuristic) if priority else 0,
+                                frontier_key(next_state))
+
+    if stats is not None:
+        stats.closed_size = len(explored)
+        if cache_info is not None:
+            stats.heuristic_cache = cache_info()
+    if path is None and budget is not None and budget.hit:
+        if stats is not None:
+            stats.deadline_hit = True
+        if best_node is not None:
+            return best_node.path()
+        most_recent_node = initial_node
+    if path is None and fallback is not None:
+        if stats is not None:
+            stats.failsafe = True
+        path = fallback(problem, most_recent_node.state)
+    return path
 
-                # Check if the frontier contains a node with the next state
-                # If so, set boolean which prevents adding to frontier
-                # Maintain temp queue to hold items popped from frontier
-                # Push items from temp queue back onto frontier
-
-                frontier_contains_next_state = False
-                temp_queue = util.Queue()
 
-                while not frontier.isEmpty():
-                    current = frontier.pop()
-                    if current[0]['snake'].head.pos == next_state['snake'].head.pos:
-                        frontier_contains_next_state = True
-
-                    temp_queue.push(current)
+'''
+Returns: True if no state on the path from the root to the node has lost
+'''
+def survives(problem, node):
+    while node is not None:
+        if problem.is_dead(node.state):
+            return False
+        node = node.parent
+    return True
 
-                while not temp_queue.isEmpty():
-                    frontier.push(temp_queue.pop())
 
-                if not frontier_contains_next_state:
-                    frontier.push((next_state, current_node_path + [action]))
+'''
+Fallback when the frontier runs dry: a random move that does not die immediately
+Input: search problem, the state to move from
+Returns: search path of a single action
+'''
+def failsafe(problem, state):
     try:
         print("failsafe")
-        successor_list = problem.get_better_successors(most_recent_node[0])
+        successor_list = problem.get_better_successors(state)
         actions = []
         for successor in successor_list:
             actions.append(successor[1])
-        return [random.choice(actions)]
+        return [problem.rng.choice(actions)]
     except IndexError:
         # Arbitrarily return left if get better successors was an empty list
         return [util.Action.LEFT]
 
 
-'''
-Search the node of least total cost first
-Input: search problem
-Returns: search path, a sequence of actions
-'''
-def ucs(problem, heuristic=None):
-    # Initialize problem, pushing first node to frontier
-    initial_node = (problem.get_start_state(), [], 0)
-    frontier = util.PriorityQueue()
-    frontier.push(initial_node, 0)
-    explored = []
+# Frontier priorities of a node: g (ucs), g + h (astar) and h (greedy)
+def path_cost(node, heuristic):
+    return node.cost
 
-    while not frontier.isEmpty():
 
-        current_node = frontier.pop()
-        current_node_state = current_node[0]
-        current_node_path = current_node[1]
-        current_node_cost = current_node[2]
-        explored.append(current_node_state)
+def total_cost(node, heuristic):
+    return node.cost + heuristic(node.state)
 
-        if problem.is_goal_state(current_node_state):
-            return current_node_path
 
-        for successor in problem.get_successors(current_node_state):
-            action = successor[1]
-            next_state = successor[0]
-            step_cost = successor[2]
+def heuristic_cost(node, heuristic):
+    return heuristic(node.state)
 
-            next_cost = current_node_cost + step_cost
-            next_node = (next_state, current_node_path + [action], next_cost)
 
-            if next_state not in explored:
+'''
+Searchest the deepest nodes in the search tree first
+Input: search problem, optional util.SearchStats
+Returns: search path, a sequence of actions
+'''
+def dfs(problem, heuristic=None, stats=None):
+    return graph_search(problem, util.Stack(), fallback=failsafe, stats=stats)
 
-                # Check if the frontier contains node with next state
-                # If so, replace node in frontier with the next cost
-                # (Only if the next cost has a lower priority)
-                # Maintain temporary priority queue and push back on to frontier
-
-                frontier_contains_next_state = False
-                temp_queue = util.PriorityQueue()
-
-                while not frontier.isEmpty():
-                    current = frontier.pop()
-                    #if current[0] == next_state:
-                    if current[0]['snake'].head.pos == next_state['snake'].head.pos:
-                        frontier_contains_next_state = True
-                        if current[2] > next_cost:
-                            temp_queue.push(next_node, next_cost)
-                        else:
-                            temp_queue.push(current, current[2])
-
-                    else:
-                        temp_queue.push(current, current[2])
-
-                while not temp_queue.isEmpty():
-                    temp_node = temp_queue.pop()
-                    frontier.push(temp_node, temp_node[2])
-
-                if not frontier_contains_next_state:
-                    frontier.push(next_node, next_cost)
-
-def ucs_plus(problem, heuristic=None):
-    # Initialize problem, pushing first node to frontier
-    initial_node = (problem.get_start_state(), [], 0)
-    frontier = util.PriorityQueue()
-    frontier.push(initial_node, 0)
-    explored = []
-    most_recent_node = initial_node
 
-    while not frontier.isEmpty():
+def dls(problem, heuristic=None, stats=None):
+    cutoff = (problem.board.rows + problem.board.cols) * 2
+    return graph_search(problem, util.Stack(), successors=problem.get_better_successors,
+                        fallback=failsafe, depth_limit=cutoff, stats=stats)
 
-        current_node = frontier.pop()
-        most_recent_node = current_node
-        current_node_state = current_node[0]
-        current_node_path = current_node[1]
-        current_node_cost = current_node[2]
-        explored.append(current_node_state)
 
-        if problem.is_goal_state(current_node_state):
-            return current_node_path
+'''
+Search the shallowest nodes in the search tree first
+Input: search problem, optional util.SearchStats
+Returns: search path, a sequence of actions
+'''
+def bfs(problem, heuristic=None, stats=None):
+    return graph_search(problem, util.Queue(), stats=stats)
 
-        for successor in problem.get_better_successors(current_node_state):
-            action = successor[1]
-            next_state = successor[0]
-            step_cost = successor[2]
 
-            next_cost = current_node_cost + step_cost
-            next_node = (next_state, current_node_path + [action], next_cost)
+def bfs_plus(problem, heuristic=None, stats=None):
+    return graph_search(problem, util.Queue(), successors=problem.get_better_successors,
+                        fallback=failsafe, stats=stats)
 
-            if next_state not in explored:
 
-                # Check if the frontier contains node with next state
-                # If so, replace node in frontier with the next cost
-                # (Only if the next cost has a lower priority)
-                # Maintain temporary priority queue and push back on to frontier
-
-                frontier_contains_next_state = False
-                temp_queue = util.PriorityQueue()
-
-                while not frontier.isEmpty():
-                    current = frontier.pop()
-                    #if current[0] == next_state:
-                    if current[0]['snake'].head.pos == next_state['snake'].head.pos:
-                        frontier_contains_next_state = True
-                        if current[2] > next_cost:
-                            temp_queue.push(next_node, next_cost)
-                        else:
-                            temp_queue.push(current, current[2])
-
-                    else:
-                        temp_queue.push(current, current[2])
-
-                while not temp_queue.isEmpty():
-                    temp_node = temp_queue.pop()
-                    frontier.push(temp_node, temp_node[2])
-
-                if not frontier_contains_next_state:
-                    frontier.push(next_node, next_cost)
-    try:
-        print("failsafe")
-        successor_list = problem.get_better_successors(most_recent_node[0])
-        actions = []
-        for successor in successor_list:
-            actions.append(successor[1])
-        return [random.choice(actions)]
-    except IndexError:
-        # Arbitrarily return left if get better successors was an empty list
-        return [util.Action.LEFT]
+'''
+Search the node of least total cost first
+Input: search problem, optional util.SearchStats
+Returns: search path, a sequence of actions
+'''
+def ucs(problem, heuristic=None, stats=None):
+    return graph_search(problem, util.PriorityQueue(), priority=path_cost, stats=stats)
 
 
+def ucs_plus(problem, heuristic=None, stats=None):
+    return graph_search(problem, util.PriorityQueue(), priority=path_cost,
+                        successors=problem.get_better_successors, fallback=failsafe, stats=stats)
 
 
 '''
 Search the node that has the lowest combined cost and heuristic first.
-Input: search problem, heuristic function
+Input: search problem, heuristic function, optional util.SearchStats
 Returns: search path, a sequence of actions
 '''
-def astar(problem, heuristic):
-
-    # Initialize problem, pushing first node to frontier
-    initial_node = (problem.get_start_state(), [], 0)
-    frontier = util.PriorityQueue()
-    frontier.push(initial_node, heuristic( problem.get_start_state()) )
-    explored = []
-
-    while not frontier.isEmpty():
-        current_node = frontier.pop()
-        current_node_state = current_node[0]
-        current_node_path = current_node[1]
-        current_node_cost = current_node[2]
-        explored.append(current_node_state)
-
-        if problem.is_goal_state(current_node_state):
-            return current_node_path
-
-        for successor in problem.get_successors(current_node_state):
-            action = successor[1]
-            next_state = successor[0]
-            step_cost = successor[2]
-
-            next_cost = current_node_cost + step_cost
-            next_node = (next_state, current_node_path + [action], next_cost)
-            next_priority = next_cost + heuristic(next_state)
-
-            if next_state not in explored:
-
-
-                # Check if the frontier contains node with next state
-                # If so, replace node in frontier with the next priority if lower
-                # Maintain temporary priority queue and push back on to frontier
+def astar(problem, heuristic, stats=None):
+    return graph_search(problem, util.PriorityQueue(), priority=total_cost, heuristic=heuristic,
+                        stats=stats)
 
-                frontier_contains_next_state = False
-                temp_queue = util.PriorityQueue()
-
-                while not frontier.isEmpty():
-                    current = frontier.pop()
-
-
-                    # Get priority by adding the step cost to the heuristic value at the current state
-                    current_priority = current[2] + heuristic(current[0])
-
-                    #if current[0] == next_state:
-                    if current[0]['snake'].head.pos == next_state['snake'].head.pos:
-                        frontier_contains_next_state = True
-
-                        if current_priority > next_priority:
-                            temp_queue.push(next_node, next_priority)
-                        else:
-                            temp_queue.push(current, current_priority)
-                    else:
-                        temp_queue.push(current, current_priority)
-
-                while not temp_queue.isEmpty():
-                    temp_node = temp_queue.pop()
-                    temp_priority = temp_node[2] + heuristic(temp_node[0])
-                    frontier.push(temp_node, temp_priority)
-
-                if not frontier_contains_next_state:
-                    frontier.push(next_node, next_priority)
-
-
-
-def astar_plus(problem, heuristic):
-    # Initialize problem, pushing first node to frontier
-    initial_node = (problem.get_start_state(), [], 0)
-    frontier = util.PriorityQueue()
-    frontier.push(initial_node, heuristic( problem.get_start_state()) )
-    explored = []
-    most_recent_node = initial_node
-
-    while not frontier.isEmpty():
-        current_node = frontier.pop()
-        most_recent_node = current_node
-        current_node_state = current_node[0]
-        current_node_path = current_node[1]
-        current_node_cost = current_node[2]
-        explored.append(current_node_state)
-
-        if problem.is_goal_state(current_node_state):
-            return current_node_path
-
-        for successor in problem.get_better_successors(current_node_state):
-            action = successor[1]
-            next_state = successor[0]
-            step_cost = successor[2]
-
-            next_cost = current_node_cost + step_cost
-            next_node = (next_state, current_node_path + [action], next_cost)
-            next_priority = next_cost + heuristic(next_state)
-
-            if next_state not in explored:
-                # Check if the frontier contains node with next state
-                # If so, replace node in frontier with the next priority if lower
-                # Maintain temporary priority queue and push back on to frontier
-
-                frontier_contains_next_state = False
-                temp_queue = util.PriorityQueue()
-
-                while not frontier.isEmpty():
-                    current = frontier.pop()
-
-
-                    # Get priority by adding the step cost to the heuristic value at the current state
-                    current_priority = current[2] + heuristic(current[0])
-
-                    #if current[0] == next_state:
-                    if current[0]['snake'].head.pos == next_state['snake'].head.pos:
-                        frontier_contains_next_state = True
-
-                        if current_priority > next_priority:
-                            temp_queue.push(next_node, next_priority)
-                        else:
-                            temp_queue.push(current, current_priority)
-                    else:
-                        temp_queue.push(current, current_priority)
-
-                while not temp_queue.isEmpty():
-                    temp_node = temp_queue.pop()
-                    temp_priority = temp_node[2] + heuristic(temp_node[0])
-                    frontier.push(temp_node, temp_priority)
-
-                if not frontier_contains_next_state:
-                    frontier.push(next_node, next_priority)
-    try:
-        print("failsafe")
-        successor_list = problem.get_better_successors(most_recent_node[0])
-        actions = []
-        for successor in successor_list:
-            actions.append(successor[1])
-        return [random.choice(actions)]
-    except IndexError:
-        # Arbitrarily return left if get better successors was an empty list
-        return [util.Action.LEFT]
 
+def astar_plus(problem, heuristic, stats=None):
+    return graph_search(problem, util.PriorityQueue(), priority=total_cost, heuristic=heuristic,
+                        successors=problem.get_better_successors, fallback=failsafe, stats=stats)
 
 
 '''
 Search the node that has the lowest heuristic
-Input: search problem, heuristic function
+Input: search problem, heuristic function, optional util.SearchStats
 Returns: search path, a sequence of actions
 '''
-
-def greedy(problem, heuristic):
-    # Initialize problem, pushing first node to frontier
-    initial_node = (problem.get_start_state(), [], 0)
-    frontier = util.PriorityQueue()
-
-    frontier.push(initial_node, heuristic(problem.get_start_state()))
-    explored = []
-
-    while not frontier.isEmpty():
-
-        current_node = frontier.pop()
-        current_node_state = current_node[0]
-        current_node_path = current_node[1]
-        current_node_cost = current_node[2]
-        explored.append(current_node_state)
-
-        if problem.is_goal_state(current_node_state):
-            return current_node_path
-
-        for successor in problem.get_successors(current_node_state):
-            action = successor[1]
-            next_state = successor[0]
-            next_priority = heuristic(next_state)
+def greedy(problem, heuristic, stats=None):
+    return graph_search(problem, util.PriorityQueue(), priority=heuristic_cost, heuristic=heuristic,
+                        stats=stats)
 
 
-            next_node = (next_state, current_node_path + [action], heuristic(next_state))
+def greedy_plus(problem, heuristic, stats=None):
+    return graph_search(problem, util.PriorityQueue(), priority=heuristic_cost, heuristic=heuristic,
+                        successors=problem.get_better_successors, fallback=failsafe, stats=stats)
 
 
-            if next_state not in explored:
-
-                # Check if the frontier contains node with next state
-                # If so, replace node in frontier with the next priority if lower
-                # Maintain temporary priority queue and push back on to frontier
-
-                frontier_contains_next_state = False
-                temp_queue = util.PriorityQueue()
-
-                while not frontier.isEmpty():
-                    current = frontier.pop()
-
-                    # Get priority by adding the step cost to the heuristic value at the current state
-                    current_priority = heuristic(current[0])
-
-                    # if current[0] == next_state:
-                    if current[0]['snake'].head.pos == next_state['snake'].head.pos:
-                        frontier_contains_next_state = True
-
-                        if current_priority > next_priority:
-                            temp_queue.push(next_node, next_priority)
-                        else:
-                            temp_queue.push(current, current_priority)
-                    else:
-                        temp_queue.push(current, current_priority)
-
-                while not temp_queue.isEmpty():
-                    temp_node = temp_queue.pop()
-                    temp_priority = heuristic(temp_node[0])
-                    frontier.push(temp_node, temp_priority)
-
-                if not frontier_contains_next_state:
-                    frontier.push(next_node, next_priority)
-
-
-def greedy_plus(problem, heuristic):
-    # Initialize problem, pushing first node to frontier
-    initial_node = (problem.get_start_state(), [], 0)
-    frontier = util.PriorityQueue()
-
-    frontier.push(initial_node, heuristic(problem.get_start_state()))
-    explored = []
-    most_recent_node = initial_node
-
-    while not frontier.isEmpty():
-
-        current_node = frontier.pop()
-        most_recent_node = current_node
-        current_node_state = current_node[0]
-        current_node_path = current_node[1]
-        current_node_cost = current_node[2]
-        explored.append(current_node_state)
-
-        if problem.is_goal_state(current_node_state):
-            return current_node_path
-
-        for successor in problem.get_better_successors(current_node_state):
-            action = successor[1]
-            next_state = successor[0]
-            next_priority = heuristic(next_state)
-
-
-            next_node = (next_state, current_node_path + [action], heuristic(next_state))
-
-
-            if next_state not in explored:
-
-                # Check if the frontier contains node with next state
-                # If so, replace node in frontier with the next priority if lower
-                # Maintain temporary priority queue and push back on to frontier
-
-                frontier_contains_next_state = False
-                temp_queue = util.PriorityQueue()
-
-                while not frontier.isEmpty():
-                    current = frontier.pop()
-
-                    # Get priority by adding the step cost to the heuristic value at the current state
-                    current_priority = heuristic(current[0])
+'''
+Hands a plan over to another search part way through, on what is left of
+the problem's budget rather than a fresh one; the budget's hit flag is set
+if the second search runs out
+Input: search_function, the search to hand over to; problem, heuristic;
+       optional util.SearchStats; expanded, nodes expanded before the
+       hand-off (default: as of the budget's last check)
+Returns: search path, a sequence of actions
+'''
+def resume(search_function, problem, heuristic, stats=None, expanded=None):
+    budget = problem.budget
+    if budget is None:
+        return search_function(problem, heuristic, stats=stats)
+    problem.budget = budget.remaining(expanded)
+    try:
+        return search_function(problem, heuristic, stats=stats)
+    finally:
+        budget.hit = problem.budget.hit
+        problem.budget = budget
 
-                    # if current[0] == next_state:
-                    if current[0]['snake'].head.pos == next_state['snake'].head.pos:
-                        frontier_contains_next_state = True
 
-                        if current_priority > next_priority:
-                            temp_queue.push(next_node, next_priority)
-                        else:
-                            temp_queue.push(current, current_priority)
-                    else:
-                        temp_queue.push(current, current_priority)
+'''
+Returns: True if walking the actions from the state never hits a wall or the body
+'''
+def walks_safely(state, actions):
+    for action in actions:
+        state = state.step(action)
+        if state.wall_collide() or state.body_collide():
+            return False
+    return True
 
-                while not temp_queue.isEmpty():
-                    temp_node = temp_queue.pop()
-                    temp_priority = heuristic(temp_node[0])
-                    frontier.push(temp_node, temp_priority)
 
-                if not frontier_contains_next_state:
-                    frontier.push(next_node, next_priority)
-    try:
-        print("failsafe")
-        successor_list = problem.get_better_successors(most_recent_node[0])
-        actions = []
-        for successor in successor_list:
-            actions.append(successor[1])
-        return [random.choice(actions)]
-    except IndexError:
-        # Arbitrarily return left if get better successors was an empty list
-        return [util.Action.LEFT]
+'''
+Runs one of the searches above on searchproblem.TimedSearchProblem, built from
+the given problem's game and start state, so nodes hold (head, depth) pairs
+and collisions are checked against release times instead of snake copies.
+The timed problem does not know where the plan itself has been, so the path
+is walked once on the snake; if it runs into the snake's new body, the plan
+is searched again on the given problem, on what is left of the budget.
+Input: search_function, the search to run
+Returns: the wrapped search, called like the others
+'''
+def timed(search_function):
+    def timed_search(problem, heuristic=None, stats=None):
+        state = problem.get_start_state()
+        timed_problem = searchproblem.TimedSearchProblem(problem.game, state, problem.budget)
+        path = search_function(timed_problem, heuristic, stats)
+        if not path or walks_safely(state, path):
+            return path
+        return resume(search_function, problem, heuristic, stats=stats)
+    timed_search.__name__ = "timed_" + search_function.__name__
+    return timed_search
+
+
+timed_bfs = timed(bfs)
+timed_astar = timed(astar)
@@ -1,3 +1,4 @@
+import random
 from util import Action
 from setup import *
 
@@ -7,6 +8,13 @@ Does not implement any of the methods.
 '''
 class SearchProblem:
 
+    # Source of randomness for the search (e.g. fallback moves); the random module by default
+    rng = random
+    # The setup.Board the problem is played on
+    board = DEFAULT_BOARD
+    # util.SearchBudget limiting each search, or None to search to completion
+    budget = None
+
     '''
     Returns the start state for the search problem.
     '''
@@ -30,6 +38,21 @@ class SearchProblem:
     def get_successors(self, state):
         pass
 
+    '''
+    Input: state, a search state
+    Returns: hashable key that identifies frontier nodes; a node reaching
+             a key that is already in the frontier replaces or yields to it
+    '''
+    def frontier_key(self, state):
+        return state
+
+    '''
+    Input: state, a search state
+    Returns: True if the state has already lost (never part of a partial plan)
+    '''
+    def is_dead(self, state):
+        return False
+
     '''
     Input: actions, a list of actions to take
     Retrns: total cost of a sequence of (legal) actions
@@ -45,26 +68,33 @@ def get_moves():
 
 class SimpleSearchProblem(SearchProblem):
 
-    def __init__(self, game, starting_state):
+    def __init__(self, game, starting_state, budget=None):
         self.game = game
         self.start_state = starting_state
+        self.rng = game.move_rng
+        self.board = game.board
+        self.budget = budget
 
 
     def get_start_state(self):
         return self.start_state
 
     def is_goal_state(self, state):
+        return state.head == state.food
 
+    def frontier_key(self, state):
+        # Frontier nodes are told apart by where the head is
+        return state.head
 
-        #return state['head'].get_pos() == state['food']
-        return state['snake'].head.pos == state['food']
+    def is_dead(self, state):
+        return state.wall_collide() or state.body_collide()
 
 
     def get_successors(self, state):
         successors = []
         for action in get_moves():
             successor = self.game.get_new_state(state, action)
-            if successor['snake'].wall_collide() or successor['snake'].body_collide():
+            if successor.wall_collide() or successor.body_collide():
                 cost = 999
             else:
                 cost = 1
@@ -77,7 +107,7 @@ class SimpleSearchProblem(SearchProblem):
         successors = []
         for action in get_moves():
             successor = self.game.get_new_state(state, action)
-            if successor['snake'].wall_collide() or successor['snake'].body_collide():
+            if successor.wall_collide() or successor.body_collide():
                 cost = 999
             else:
                 cost = 1
@@ -98,3 +128,92 @@ class SimpleSearchProblem(SearchProblem):
     def get_cost_of_actions(self, actions):
         pass
 
+
+'''
+Search state of TimedSearchProblem: where the head is after depth moves.
+The food and board are shared with the problem, and body is the snake at the
+start of the plan (it does not follow the head), for heuristics that look at it.
+'''
+class TimedState:
+
+    __slots__ = ('head', 'depth', 'food', 'board', 'body', 'dead')
+
+    def __init__(self, head, depth, food, board, body, dead=False):
+        self.head = head
+        self.depth = depth
+        self.food = food
+        self.board = board
+        self.body = body
+        # The head hit a wall or a body cell that had not freed up yet
+        self.dead = dead
+
+    @property
+    def key(self):
+        return (self.head, self.depth, self.food)
+
+    def __eq__(self, other):
+        return isinstance(other, TimedState) and self.key == other.key
+
+    def __hash__(self):
+        return hash((self.head, self.depth, self.food))
+
+    def __repr__(self):
+        return "TimedState(head=" + str(self.head) + ", depth=" + str(self.depth) + ", food=" + str(self.food) + ")"
+
+
+'''
+Search problem over time-indexed occupancy. Every body cell carries the depth
+at which it frees up (SnakeState.release_times), so a move is blocked at depth
+d by one integer comparison and a search state is a (head, depth) pair
+instead of a copy of the snake. Past the last release nothing is left to free,
+so deeper states keep that depth.
+The release times only cover the body the snake starts with, not the cells
+the plan itself enters, so a plan can still run into the snake's new body;
+search.timed checks the path it returns on the snake.
+'''
+class TimedSearchProblem(SearchProblem):
+
+    def __init__(self, game, starting_state, budget=None):
+        self.game = game
+        self.rng = game.move_rng
+        self.board = starting_state.board
+        self.budget = budget
+        self.release = starting_state.release_times()
+        self.horizon = max(self.release)
+        head = starting_state.head
+        self.start_state = TimedState(head, 0, starting_state.food, self.board, starting_state.body)
+        self.moves = [(action, action.value) for action in get_moves()]
+
+    def get_start_state(self):
+        return self.start_state
+
+    def is_goal_state(self, state):
+        return state.head == state.food
+
+    def frontier_key(self, state):
+        # Frontier nodes are told apart by where the head is, as in SimpleSearchProblem
+        return state.head
+
+    def is_dead(self, state):
+        return state.dead
+
+    '''
+    Returns: list of triples (successor, action, cost), cost 999 into a wall or body
+    '''
+    def get_successors(self, state):
+        successors = []
+        x, y = state.head
+        depth = state.depth + 1
+        rows, cols = self.board.rows, self.board.cols
+        for action, (dx, dy) in self.moves:
+            nx, ny = x + dx, y + dy
+            dead = not (0 <= nx < rows and 0 <= ny < cols) or self.release[nx * cols + ny] > depth
+            successor = TimedState((nx, ny), min(depth, self.horizon), state.food, state.board, state.body, dead)
+            successors.append((successor, action, 999 if dead else 1))
+        return successors
+
+    def get_better_successors(self, state):
+        return [successor for successor in self.get_successors(state) if not successor[0].dead]
+
+    def get_cost_of_actions(self, actions):
+        pass
@@ -8,6 +8,55 @@ CELL_SIZE = WIDTH // ROWS
 # Starting position
 START_POS = (5, 5)
 
+
+'''
+Board geometry. A Board is handed to the game, the snake, search states and
+the renderer, so games on boards of different sizes can run side by side in
+one process; the constants above describe DEFAULT_BOARD.
+Input: rows, cols, board size in cells
+       width, window size in pixels along the longer side
+       start_pos, starting head position (default the centre of the board)
+'''
+class Board:
+
+    def __init__(self, rows=ROWS, cols=COLS, width=WIDTH, start_pos=None):
+        self.rows = rows
+        self.cols = cols
+        self.cells = rows * cols
+        self.start_pos = start_pos if start_pos is not None else (rows // 2, cols // 2)
+        self.cell_size = width // max(rows, cols)
+        # Cells are square, so the window takes the board's shape
+        self.width = rows * self.cell_size
+        self.height = cols * self.cell_size
+
+    '''
+    Returns true if the given position lies on the board
+    '''
+    def in_bounds(self, pos):
+        return 0 <= pos[0] < self.rows and 0 <= pos[1] < self.cols
+
+    '''
+    Returns the flat index of a cell, x * cols + y
+    '''
+    def index(self, pos):
+        return pos[0] * self.cols + pos[1]
+
+    @property
+    def key(self):
+        return (self.rows, self.cols, self.start_pos)
+
+    def __eq__(self, other):
+        return isinstance(other, Board) and self.key == other.key
+
+    def __hash__(self):
+        return hash(self.key)
+
+    def __repr__(self):
+        return "Board(" + str(self.rows) + "x" + str(self.cols) + ", start_pos=" + str(self.start_pos) + ")"
+
+
+DEFAULT_BOARD = Board(ROWS, COLS, WIDTH, START_POS)
+
 # Color tuples
 WHITE = (255, 255, 255)
 BLACK = (0, 0, 0)
@@ -0,0 +1,168 @@
+from util import Action
+from setup import *
+
+
+# (dx, dy) for every action, looked up once instead of going through Enum.value
+DELTAS = {action: action.value for action in Action}
+
+
+'''
+Returns the bit of the given in-bounds cell in an occupancy bitboard
+'''
+def cell_bit(pos, board=DEFAULT_BOARD):
+    return 1 << (pos[0] * board.cols + pos[1])
+
+
+'''
+Returns true if the given position lies on the board
+'''
+def in_bounds(pos, board=DEFAULT_BOARD):
+    return 0 <= pos[0] < board.rows and 0 <= pos[1] < board.cols
+
+
+'''
+Immutable, hashable snapshot of a snake and the food it is chasing.
+The body is a tuple of (x, y) cells ordered from head to tail, so a successor
+is a single tuple allocation and shares no mutable data with its parent.
+Used as the search state by searchproblem, search and the heuristics in util.
+
+The state carries the setup.Board it is played on, and its depth: the number
+of step() calls since a state was built directly (not part of its key).
+Body cells are also kept in an int bitboard (bit x * cols + y) that step()
+updates incrementally, so collision checks are single bit tests. The
+incremental update needs every segment on the board and on a distinct cell
+('clean'); states descended from a collision rebuild the bitboard instead.
+'''
+class SnakeState:
+
+    __slots__ = ('body', 'food', 'board', 'depth', 'occupancy', 'bitten', 'clean', '_hash')
+
+    def __init__(self, body, food, board=DEFAULT_BOARD, depth=0):
+        self.body = tuple(body)
+        self.food = food
+        self.board = board
+        self.depth = depth
+        self._hash = None
+        self._rebuild_occupancy()
+
+    '''
+    Internal constructor for step(), which already knows the bitboard
+    '''
+    @classmethod
+    def _make(cls, body, food, board, depth, occupancy, bitten, clean):
+        state = cls.__new__(cls)
+        state.body = body
+        state.food = food
+        state.board = board
+        state.depth = depth
+        state.occupancy = occupancy
+        state.bitten = bitten
+        state.clean = clean
+        state._hash = None
+        return state
+
+    def _rebuild_occupancy(self):
+        occupancy = 0
+        clean = True
+        board = self.board
+        for pos in self.body:
+            if in_bounds(pos, board):
+                bit = cell_bit(pos, board)
+                if occupancy & bit:
+                    clean = False
+                occupancy |= bit
+            else:
+                clean = False
+        self.occupancy = occupancy
+        self.clean = clean
+        self.bitten = self.body.count(self.body[0]) > 1
+
+    @property
+    def head(self):
+        return self.body[0]
+
+    @property
+    def tail(self):
+        return self.body[-1]
+
+    @property
+    def length(self):
+        return len(self.body)
+
+    '''
+    Canonical key of the state: every body cell from the head down, and the food.
+    States are equal and hash alike exactly when their keys match.
+    '''
+    @property
+    def key(self):
+        return (self.body, self.food)
+
+    def __eq__(self, other):
+        return isinstance(other, SnakeState) and self.body == other.body and self.food == other.food
+
+    def __hash__(self):
+        # Cached, so closed-set checks only hash the body once per state
+        if self._hash is None:
+            self._hash = hash((self.body, self.food))
+        return self._hash
+
+    def __repr__(self):
+        return "SnakeState(body=" + str(self.body) + ", food=" + str(self.food) + ")"
+
+    '''
+    Input: action, the direction the head moves in
+           grow, keep the tail in place (the snake just ate)
+    Returns: the successor state; every segment follows the one ahead of it
+    '''
+    def step(self, action, grow=False):
+        dx, dy = DELTAS[action]
+        head = self.body[0]
+        new_head = (head[0] + dx, head[1] + dy)
+        if grow:
+            body = (new_head,) + self.body
+        else:
+            body = (new_head,) + self.body[:-1]
+
+        board = self.board
+        if not self.clean:
+            return SnakeState(body, self.food, board, self.depth + 1)
+
+        occupancy = self.occupancy
+        if not grow:
+            # The tail retracts before the head lands, so the head may enter the old tail cell
+            occupancy ^= cell_bit(self.body[-1], board)
+        if 0 <= new_head[0] < board.rows and 0 <= new_head[1] < board.cols:
+            head_bit = 1 << (new_head[0] * board.cols + new_head[1])
+            bitten = occupancy & head_bit != 0
+            return SnakeState._make(body, self.food, board, self.depth + 1, occupancy | head_bit, bitten, not bitten)
+        return SnakeState._make(body, self.food, board, self.depth + 1, occupancy, False, False)
+
+    '''
+    Returns true if any segment covers the given position
+    '''
+    def is_occupied(self, pos):
+        return in_bounds(pos, self.board) and self.occupancy & cell_bit(pos, self.board) != 0
+
+    '''
+    When each cell frees up as the snake moves on without eating: the head may
+    enter the cell of segment i (0 the head) from depth length - i onwards,
+    so the tail's cell is free from the first move
+    Returns: list over flat cell indices (x * cols + y) of the first depth the
+             head may enter each cell, 0 for empty cells
+    '''
+    def release_times(self):
+        board = self.board
+        release = [0] * board.cells
+        length = len(self.body)
+        for i, pos in enumerate(self.body):
+            if in_bounds(pos, board):
+                index = pos[0] * board.cols + pos[1]
+                release[index] = max(release[index], length - i)
+        return release
+
+    def wall_collide(self):
+        head = self.body[0]
+        return not self.board.in_bounds(head)
+
+    def body_collide(self):
+        return self.bitten
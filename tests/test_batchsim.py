@@ -0,0 +1,64 @@
+import random
+import unittest
+
+from engine import Game, Snake
+from setup import Board
+
+try:
+    import numpy as np
+    from batchsim import BatchSnakeEnv, MOVES
+except ImportError:
+    np = None
+
+'''
+Differential check of the batch simulator: every game is mirrored by an
+engine.Game fed the same moves (and the food the batch placed), and the two
+must agree on the body, the score and how each game ends.
+'''
+
+
+def batch_body(env, i):
+    return [divmod(int(env.ring[i, (env.head_ptr[i] - k) % env.cells]), env.cols)
+            for k in range(env.length[i])]
+
+
+@unittest.skipIf(np is None, "NumPy is not installed")
+class BatchSnakeEnvTest(unittest.TestCase):
+
+    def check_mirrored(self, board, n, steps, seed, noise):
+        env = BatchSnakeEnv(n, board, seed=seed, auto_reset=False)
+        games = [Game(Snake(board.start_pos, board), random.Random(i)) for i in range(n)]
+        for i, game in enumerate(games):
+            game.food = divmod(int(env.food[i]), board.cols)
+        rng = np.random.default_rng(seed)
+        for _ in range(steps):
+            # Mostly greedy, with enough random moves that games also die
+            actions = np.where(rng.random(n) < noise, rng.integers(len(MOVES), size=n), env.greedy_actions())
+            alive = ~env.done
+            ate, died = env.step(actions)
+            for i in np.flatnonzero(alive):
+                game = games[i]
+                score = game.score
+                death = game.advance(MOVES[actions[i]])
+                self.assertEqual(bool(died[i]), death in ("Wall Collision", "Body Collision"), i)
+                self.assertEqual(bool(ate[i]), game.score > score, i)
+                if died[i]:
+                    continue
+                self.assertEqual(batch_body(env, i), list(game.snake.body), i)
+                self.assertEqual(int(env.score[i]), game.score, i)
+                self.assertEqual(bool(env.done[i]), death == "Board Full", i)
+                if ate[i] and not env.done[i]:
+                    game.food = divmod(int(env.food[i]), board.cols)
+            if env.done.all():
+                break
+
+    def test_matches_engine(self):
+        self.check_mirrored(Board(10, 10), 64, 1000, 0, 0.03)
+
+    def test_matches_engine_on_a_small_board(self):
+        # Small enough that some games fill the board
+        self.check_mirrored(Board(4, 5), 64, 1000, 1, 0.05)
+
+
+if __name__ == '__main__':
+    unittest.main()
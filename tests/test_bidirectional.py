@@ -0,0 +1,88 @@
+import io
+import random
+import unittest
+from contextlib import redirect_stdout
+
+import gridsearch
+import incremental
+import scaling
+import searchproblem
+import util
+from engine import Game, Snake
+from setup import Board
+from tests.test_incremental import bfs_distance
+
+'''
+Differential check of the bidirectional searches: both see every body cell
+but the head as a wall, so wherever a BFS over those walls reaches the food,
+their paths must run through free cells to the food and be just as short.
+Out of budget, they must still walk only through free cells.
+'''
+
+
+'''
+Returns: the cells walked by the actions from the head, or None if they leave
+         the board or enter a wall
+'''
+def walk(state, actions):
+    blocked = set(state.body[1:])
+    pos = state.head
+    cells = [pos]
+    for action in actions:
+        pos = (pos[0] + action.value[0], pos[1] + action.value[1])
+        if not state.board.in_bounds(pos) or pos in blocked:
+            return None
+        cells.append(pos)
+    return cells
+
+
+def plan(function, game, state, budget=None):
+    stats = util.SearchStats()
+    with redirect_stdout(io.StringIO()):
+        path = function(searchproblem.SimpleSearchProblem(game, state, budget), None, stats=stats)
+    return path, stats
+
+
+class BidirectionalSearchTest(unittest.TestCase):
+
+    def states(self):
+        for size, length in ((10, 1), (10, 30), (20, 60), (15, 100)):
+            board = Board(size, size)
+            for seed in range(5):
+                body = scaling.initial_body(board, length)
+                game = Game(Snake(body[0], board, body), random.Random(seed))
+                # A few plans along each game, so the bodies get irregular
+                for _ in range(4):
+                    yield game, game.get_state()
+                    moves, _ = plan(gridsearch.bidirectional_bfs, game, game.get_state())
+                    if not moves or any(game.advance(move) for move in moves):
+                        break
+
+    def test_matches_bfs(self):
+        for game, state in self.states():
+            expected = bfs_distance(state)
+            for function in (gridsearch.bidirectional_bfs, gridsearch.bidirectional_astar):
+                path, stats = plan(function, game, state)
+                if expected == incremental.INF:
+                    self.assertTrue(stats.failsafe, (function.__name__, state))
+                    continue
+                cells = walk(state, path)
+                self.assertIsNotNone(cells, (function.__name__, state))
+                self.assertEqual(cells[-1], state.food, (function.__name__, state))
+                self.assertEqual(len(path), expected, (function.__name__, state))
+
+    def test_partial_plans_walk_through_free_cells(self):
+        for game, state in self.states():
+            for function in (gridsearch.bidirectional_bfs, gridsearch.bidirectional_astar):
+                budget = util.SearchBudget(nodes=3)
+                path, stats = plan(function, game, state, budget)
+                if not budget.hit:
+                    continue
+                self.assertTrue(stats.deadline_hit, (function.__name__, state))
+                self.assertTrue(path, (function.__name__, state))
+                if not stats.failsafe:
+                    self.assertIsNotNone(walk(state, path), (function.__name__, state))
+
+
+if __name__ == '__main__':
+    unittest.main()
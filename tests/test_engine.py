@@ -0,0 +1,40 @@
+import random
+import unittest
+
+from engine import Game, Snake
+from setup import Board
+
+'''
+Pairing check of seeded games: however differently two games on the same
+seed are played, each food spawn takes the same draws, so the food matches
+whenever it is free in both.
+'''
+
+
+class PairedFoodTest(unittest.TestCase):
+
+    def test_spawns_take_one_draw_whatever_the_body(self):
+        board = Board(10, 10)
+        short = Game(Snake(board.start_pos, board), random.Random(3))
+        # Covers most of the interior, so rejection sampling would need many draws
+        body = [(x, y) for x in range(1, 10) for y in (range(1, 10) if x % 2 else range(9, 0, -1))][:70]
+        long = Game(Snake(body[0], board, body), random.Random(3))
+        for _ in range(50):
+            short.random_food()
+            long.random_food()
+            self.assertEqual(short.rng.getstate(), long.rng.getstate())
+            if long.food not in short.snake.body and short.food not in long.snake.body:
+                self.assertEqual(short.food, long.food)
+
+    def test_fallback_moves_leave_the_food_alone(self):
+        board = Board(10, 10)
+        games = [Game(Snake(board.start_pos, board), random.Random(5)) for _ in range(2)]
+        for _ in range(10):
+            games[0].move_rng.random()
+        for game in games:
+            game.random_food()
+        self.assertEqual(games[0].food, games[1].food)
+
+
+if __name__ == '__main__':
+    unittest.main()
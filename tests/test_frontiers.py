@@ -0,0 +1,98 @@
+import unittest
+
+import util
+
+'''
+The frontier containers behind search.graph_search: what each update() does
+with an item whose key is already queued, and that superseded items never
+come back out.
+'''
+
+
+class StackTest(unittest.TestCase):
+
+    def test_update_replaces_the_queued_key(self):
+        stack = util.Stack()
+        self.assertTrue(stack.update('a1', None, 'a'))
+        self.assertTrue(stack.update('b', None, 'b'))
+        self.assertTrue(stack.update('a2', None, 'a'))
+        self.assertEqual(len(stack), 2)
+        self.assertIn('a', stack)
+        self.assertEqual(stack.pop(), 'a2')
+        self.assertNotIn('a', stack)
+        self.assertEqual(stack.pop(), 'b')
+        # The superseded a1 is skipped, not returned
+        self.assertTrue(stack.isEmpty())
+
+    def test_unkeyed_items_are_kept(self):
+        stack = util.Stack()
+        stack.push(1)
+        stack.push(2)
+        self.assertEqual([stack.pop(), stack.pop()], [2, 1])
+        self.assertTrue(stack.isEmpty())
+
+
+class QueueTest(unittest.TestCase):
+
+    def test_update_yields_to_the_queued_key(self):
+        queue = util.Queue()
+        self.assertTrue(queue.update('a1', None, 'a'))
+        self.assertTrue(queue.update('b', None, 'b'))
+        self.assertFalse(queue.update('a2', None, 'a'))
+        self.assertEqual(len(queue), 2)
+        self.assertEqual(queue.pop(), 'a1')
+        self.assertNotIn('a', queue)
+        # Once popped, the key may be queued again
+        self.assertTrue(queue.update('a3', None, 'a'))
+        self.assertEqual([queue.pop(), queue.pop()], ['b', 'a3'])
+        self.assertTrue(queue.isEmpty())
+
+    def test_keys_are_counted(self):
+        queue = util.Queue()
+        queue.push('a1', 'a')
+        queue.push('a2', 'a')
+        self.assertEqual(queue.keys, {'a': 2})
+        queue.pop()
+        self.assertIn('a', queue)
+        queue.pop()
+        self.assertNotIn('a', queue)
+        self.assertEqual(queue.keys, {})
+
+
+class PriorityQueueTest(unittest.TestCase):
+
+    def test_update_lowers_the_priority(self):
+        queue = util.PriorityQueue()
+        self.assertTrue(queue.update('a1', 5, 'a'))
+        self.assertTrue(queue.update('b', 3, 'b'))
+        self.assertFalse(queue.update('a2', 5, 'a'))
+        self.assertFalse(queue.update('a3', 7, 'a'))
+        self.assertTrue(queue.update('a4', 1, 'a'))
+        self.assertEqual(len(queue), 2)
+        self.assertEqual(queue.peek(), (1, 'a4'))
+        self.assertEqual(queue.pop(), 'a4')
+        self.assertNotIn('a', queue)
+        self.assertEqual(queue.pop(), 'b')
+        # The superseded a1 is discarded lazily, not returned
+        self.assertTrue(queue.isEmpty())
+
+    def test_ties_pop_in_insertion_order(self):
+        queue = util.PriorityQueue()
+        for item in 'abc':
+            queue.update(item, 2, item)
+        self.assertEqual([queue.pop() for _ in range(3)], ['a', 'b', 'c'])
+
+    def test_remove_and_peek_skip_stale_entries(self):
+        queue = util.PriorityQueue()
+        queue.push('a', 1, 'a')
+        queue.push('b', 2, 'b')
+        queue.remove('a')
+        self.assertNotIn('a', queue)
+        self.assertEqual(len(queue), 1)
+        self.assertEqual(queue.peek(), (2, 'b'))
+        self.assertEqual(queue.pop(), 'b')
+        self.assertTrue(queue.isEmpty())
+
+
+if __name__ == '__main__':
+    unittest.main()
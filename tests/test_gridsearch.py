@@ -0,0 +1,77 @@
+import io
+import random
+import unittest
+from contextlib import redirect_stdout
+
+import gridsearch
+import scaling
+import search
+import searchproblem
+import util
+from engine import Game, Snake
+from setup import Board
+
+'''
+Differential check of jump point search against search.astar: wherever A*
+finds a safe path to the food, jump point search must find one just as short.
+'''
+
+
+'''
+Returns: the number of actions if walking them from the state reaches the
+         food without a collision, else None
+'''
+def safe_length(state, actions):
+    for action in actions:
+        state = state.step(action, False)
+        if state.wall_collide() or state.body_collide():
+            return None
+    return len(actions) if state.head == state.food else None
+
+
+def plan(function, game, state, budget=None):
+    stats = util.SearchStats()
+    with redirect_stdout(io.StringIO()):
+        path = function(searchproblem.SimpleSearchProblem(game, state, budget), util.manhattanDistance,
+                        stats=stats)
+    return path, stats
+
+
+class JumpPointSearchTest(unittest.TestCase):
+
+    def test_matches_astar(self):
+        for size, length in ((10, 1), (10, 30), (20, 10), (20, 120), (40, 40)):
+            board = Board(size, size)
+            for seed in range(6):
+                body = scaling.initial_body(board, length)
+                game = Game(Snake(body[0], board, body), random.Random(seed))
+                # A few plans along each game, so the bodies get irregular
+                for _ in range(4):
+                    state = game.get_state()
+                    jps_path, jps_stats = plan(gridsearch.jump_point_search, game, state)
+                    astar_path, astar_stats = plan(search.astar, game, state)
+                    expected = None if astar_stats.failsafe else safe_length(state, astar_path)
+                    found = None if jps_stats.failsafe else safe_length(state, jps_path)
+                    if expected is not None:
+                        self.assertEqual(found, expected, (size, length, seed, state))
+                    elif found is None and not jps_stats.failsafe:
+                        # Only the hand-off to astar can come back with an unsafe path
+                        self.assertEqual(jps_path, astar_path, (size, length, seed, state))
+                    moves = jps_path or astar_path
+                    if not moves or any(game.advance(move) for move in moves[:3]):
+                        break
+
+    def test_handoff_keeps_to_the_node_budget(self):
+        # The body walls off every path of Manhattan length, so the plan is handed to astar
+        board = Board(10, 10)
+        body = [(0, 1)] + [(x, 2) for x in range(9)]
+        game = Game(Snake(body[0], board, body), random.Random(0))
+        game.food = (0, 5)
+        budget = util.SearchBudget(nodes=20)
+        path, stats = plan(gridsearch.jump_point_search, game, game.get_state(), budget)
+        self.assertEqual(stats.expanded, 20)
+        self.assertTrue(budget.hit)
+
+
+if __name__ == '__main__':
+    unittest.main()
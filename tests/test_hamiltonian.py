@@ -0,0 +1,41 @@
+import random
+import unittest
+
+import hamiltonian
+import searchproblem
+from engine import Game, Snake
+from setup import Board
+
+'''
+Safety check of the Hamiltonian agent: with or without shortcuts, from a
+single cell or a long starting body, seeded games must all end with the
+board full rather than in a collision.
+'''
+
+
+class HamiltonianAgentTest(unittest.TestCase):
+
+    def play(self, agent, board, length, seed):
+        body = agent.initial_body(board, length)
+        game = Game(Snake(body[0], board, body), random.Random(seed))
+        for _ in range(board.cells * board.cells):
+            moves = agent(searchproblem.SimpleSearchProblem(game, game.get_state()))
+            for move in moves:
+                death = game.advance(move)
+                if death is not None:
+                    return death
+        return None
+
+    def test_fills_the_board(self):
+        # 7x12 has an odd number of rows, so its cycle is built transposed
+        for rows, cols in ((10, 10), (12, 7), (7, 12), (4, 5)):
+            board = Board(rows, cols)
+            for agent in (hamiltonian.HamiltonianAgent(), hamiltonian.HamiltonianAgent(shortcuts=False)):
+                for length in (1, rows * cols // 3):
+                    for seed in range(3):
+                        death = self.play(agent, board, length, seed)
+                        self.assertEqual(death, "Board Full", (rows, cols, agent.__name__, length, seed))
+
+
+if __name__ == '__main__':
+    unittest.main()
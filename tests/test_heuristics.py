@@ -0,0 +1,104 @@
+import io
+import random
+import unittest
+from collections import deque
+from contextlib import redirect_stdout
+
+import scaling
+import search
+import searchproblem
+import util
+from engine import Game, Snake
+from searchproblem import get_moves
+from setup import Board
+
+'''
+Check of the food distance heuristic on the states a search meets: it must be
+0 on the food and drop by at most one per live move (consistent), so it never
+overestimates the moves left and A* may use it.
+'''
+
+
+class FoodDistanceHeuristicTest(unittest.TestCase):
+
+    def check_consistent(self, state, depth, max_entries=1 << 20):
+        heuristic = util.FoodDistanceHeuristic(max_entries)
+        heuristic.prepare(state)
+        self.assertGreaterEqual(heuristic(state), util.manhattanDistance(state))
+        queue = deque([state])
+        seen = {state.key}
+        while queue:
+            current = queue.popleft()
+            value = heuristic(current)
+            if current.head == current.food:
+                self.assertEqual(value, 0, current)
+                continue
+            for action in get_moves():
+                successor = current.step(action)
+                if successor.wall_collide() or successor.body_collide():
+                    continue
+                self.assertLessEqual(value, 1 + heuristic(successor), (current, successor))
+                if successor.key not in seen and len(seen) < depth:
+                    seen.add(successor.key)
+                    queue.append(successor)
+
+    def test_consistent_around_the_body(self):
+        for size, length in ((6, 8), (8, 20), (10, 40)):
+            board = Board(size, size)
+            for seed in range(5):
+                body = scaling.initial_body(board, length)
+                game = Game(Snake(body[0], board, body), random.Random(seed))
+                for _ in range(3):
+                    state = game.get_state()
+                    self.check_consistent(state, 3000)
+                    # A horizon short of the last release, as on large boards
+                    self.check_consistent(state, 3000, size * size * 5)
+                    with redirect_stdout(io.StringIO()):
+                        moves = search.astar(searchproblem.SimpleSearchProblem(game, state), util.manhattanDistance)
+                    if not moves or any(game.advance(move) for move in moves):
+                        break
+
+    @unittest.skipIf(util.np is None, "NumPy is not installed")
+    def test_table_matches_lists(self):
+        board = Board(8, 8)
+        for seed in range(5):
+            body = scaling.initial_body(board, 25)
+            game = Game(Snake(body[0], board, body), random.Random(seed))
+            state = game.get_state()
+            release = state.release_times()
+            for horizon in (None, 10):
+                self.assertEqual(util.food_distance_table(state.food, release, board, horizon),
+                                 util.food_distance_table_lists(state.food, release, board, horizon))
+
+
+class HeuristicCacheTest(unittest.TestCase):
+
+    def test_lives_for_one_plan(self):
+        board = Board(10, 10)
+        game = Game(Snake(board.start_pos, board), random.Random(0))
+        cache = util.HeuristicCache(util.manhattanDistance)
+        state = game.get_state()
+        cache.prepare(state)
+        cache(state)
+        cache(state.step(get_moves()[0]))
+        cache(game.get_state())
+        self.assertEqual(cache.cache_info(), {'hits': 1, 'misses': 2, 'size': 2, 'maxsize': 100000})
+        # Equal states share an entry
+        self.assertEqual(len(cache.cache), 2)
+        # Plain heuristics have no prepare of their own, but the cache still starts afresh
+        cache.prepare(state)
+        self.assertEqual(cache.cache_info(), {'hits': 0, 'misses': 0, 'size': 0, 'maxsize': 100000})
+
+    def test_full_cache_evicts_the_oldest_value(self):
+        board = Board(10, 10)
+        state = Game(Snake(board.start_pos, board), random.Random(0)).get_state()
+        cache = util.HeuristicCache(util.manhattanDistance, maxsize=2)
+        cache.prepare(state)
+        states = [state, state.step(get_moves()[0]), state.step(get_moves()[1])]
+        for current in states:
+            cache(current)
+        self.assertEqual(list(cache.cache), states[1:])
+
+
+if __name__ == '__main__':
+    unittest.main()
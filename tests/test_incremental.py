@@ -0,0 +1,86 @@
+import io
+import random
+import unittest
+from collections import deque
+from contextlib import redirect_stdout
+
+import benchmark
+import incremental
+import search
+import searchproblem
+import util
+from engine import Game, Snake
+from setup import Board
+
+'''
+Differential check of the D* Lite planner: after every replan, its distance
+from the head to the food must match a fresh BFS over the same walls.
+'''
+
+
+def bfs_distance(state):
+    blocked = set(state.body[1:])
+    dist = {state.head: 0}
+    queue = deque([state.head])
+    while queue:
+        pos = queue.popleft()
+        if pos == state.food:
+            return dist[pos]
+        for neighbor in incremental.neighbors(pos, state.board):
+            if neighbor not in blocked and neighbor not in dist:
+                dist[neighbor] = dist[pos] + 1
+                queue.append(neighbor)
+    return incremental.INF
+
+
+class DStarLiteTest(unittest.TestCase):
+
+    '''
+    Plays a seeded game with the planner, checking every replan
+    Returns: the finished game
+    '''
+    def play_checked(self, planner, board, seed, food=None, max_moves=3000):
+        game = Game(Snake(board.start_pos, board), random.Random(seed))
+        if food is not None:
+            game.food = food
+        for _ in range(max_moves):
+            state = game.get_state()
+            with redirect_stdout(io.StringIO()):
+                moves = planner(searchproblem.SimpleSearchProblem(game, state), None)
+            planned = min(planner.g.get(state.head, incremental.INF), planner.rhs.get(state.head, incremental.INF))
+            self.assertEqual(planned, bfs_distance(state), (seed, state))
+            for move in moves:
+                if game.advance(move):
+                    return game
+        return game
+
+    def test_matches_bfs(self):
+        for board in (Board(10, 10), Board(7, 12)):
+            for horizon in (1, 3):
+                planner = incremental.DStarLite(horizon)
+                for seed in range(6):
+                    self.play_checked(planner, board, seed)
+
+    def test_new_game_with_same_food_starts_over(self):
+        planner = incremental.DStarLite()
+        board = Board(10, 10)
+        last = self.play_checked(planner, board, 0)
+        game = Game(Snake(board.start_pos, board), random.Random(1))
+        game.food = last.food
+        with redirect_stdout(io.StringIO()):
+            planner(searchproblem.SimpleSearchProblem(game, game.get_state()), None)
+        self.assertIs(planner.game, game)
+        self.assertEqual(planner.km, 0)
+
+    def test_deadline_hits_are_its_own(self):
+        # A budget another search ran out of, shared as in a serial benchmark run
+        budget = util.SearchBudget(nodes=1)
+        with redirect_stdout(io.StringIO()):
+            benchmark.no_display_run(search.astar, 1, seed=0, budget=budget)
+            self.assertTrue(budget.hit)
+            log = benchmark.no_display_run(incremental.dstar_lite, 2, seed=0, budget=budget)
+        self.assertEqual(log.deadline_hits, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import random
+import unittest
+
+from engine import Game, Snake
+from setup import Board
+
+try:
+    import numpy as np
+    import mdp
+except ImportError:
+    np = None
+
+'''
+Check of the two TabularModel backends: on the uncapped 3x3 game, small
+enough to enumerate whole, the dense matrix and the sparse coordinate arrays
+must give the same values, and equally good policies, under both solvers.
+'''
+
+
+@unittest.skipIf(np is None, "NumPy is not installed")
+class TabularModelTest(unittest.TestCase):
+
+    def models(self):
+        board = Board(3, 3)
+        game = Game(Snake(board.start_pos, board), random.Random(0))
+        markov = mdp.Markov(game, game.get_state())
+        dense = mdp.TabularModel(markov)
+        sparse = mdp.TabularModel(markov, dense_limit=0)
+        self.assertIsNotNone(dense.dense)
+        self.assertIsNone(sparse.dense)
+        self.assertEqual(dense.states, sparse.states)
+        return dense, sparse
+
+    def test_backends_agree(self):
+        dense, sparse = self.models()
+        values = np.random.default_rng(0).random(dense.num_states)
+        np.testing.assert_allclose(dense.q_values(values, 0.9), sparse.q_values(values, 0.9), atol=1e-12)
+        for solver in (mdp.value_iteration, mdp.policy_iteration):
+            dense_values, dense_policy = solver(dense)
+            sparse_values, sparse_policy = solver(sparse)
+            np.testing.assert_allclose(dense_values, sparse_values, atol=1e-9, err_msg=solver.__name__)
+            # Tied actions may break either way, but both policies must be greedy
+            q = dense.q_values(dense_values, 0.95)
+            states = np.arange(dense.num_states)
+            for policy in (dense_policy, sparse_policy):
+                np.testing.assert_allclose(q[policy, states], q.max(axis=0), atol=1e-9, err_msg=solver.__name__)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,63 +1,214 @@
 import heapq
+import json
+from array import array
+from collections import deque
 import time
 from enum import Enum
 from setup import *
 
+try:
+    import numpy as np
+except ImportError:
+    # The distance table falls back to plain lists without NumPy
+    np = None
+
 
 '''
-List data structure with LIFO policy
+List data structure with LIFO policy.
+Items pushed with a key are indexed by it: membership is O(1) and pushing a
+key that is already stacked lazily discards the older item.
 '''
 class Stack:
 
+    # Marks a stack entry that was superseded by a newer push of its key
+    REMOVED = object()
+
     def __init__(self):
         self.stack = []
-
-    def push(self, x):
-        self.stack.append(x)
+        # key -> live stack entry [item, key]
+        self.index = {}
+        self.live = 0
+
+    def push(self, x, key=None):
+        if key is not None and key in self.index:
+            self.index[key][0] = Stack.REMOVED
+            self.live -= 1
+        entry = [x, key]
+        self.stack.append(entry)
+        self.live += 1
+        if key is not None:
+            self.index[key] = entry
 
     def pop(self):
-        return self.stack.pop()
+        while True:
+            (x, key) = self.stack.pop()
+            if x is not Stack.REMOVED:
+                if key is not None:
+                    del self.index[key]
+                self.live -= 1
+                return x
+
+    '''
+    Depth-first frontier policy: the new item always goes on top,
+    replacing any item stacked under the same key. Priority is ignored.
+    '''
+    def update(self, x, priority, key):
+        self.push(x, key)
+        return True
+
+    def __contains__(self, key):
+        return key in self.index
+
+    def __len__(self):
+        return self.live
 
     def isEmpty(self):
-        return len(self.stack) == 0
+        return self.live == 0
 
 '''
-List data structure with FIFO policy
+Deque data structure with FIFO policy.
+Items pushed with a key are counted by it, so membership is O(1).
 '''
 class Queue:
 
     def __init__(self):
-        self.queue = []
+        self.queue = deque()
+        # key -> number of queued items pushed under it
+        self.keys = {}
 
-    def push(self, x):
-        self.queue.insert(0, x)
+    def push(self, x, key=None):
+        self.queue.append((x, key))
+        if key is not None:
+            self.keys[key] = self.keys.get(key, 0) + 1
 
     def pop(self):
-        return self.queue.pop()
+        (x, key) = self.queue.popleft()
+        if key is not None:
+            count = self.keys[key] - 1
+            if count:
+                self.keys[key] = count
+            else:
+                del self.keys[key]
+        return x
+
+    '''
+    Breadth-first frontier policy: the item is queued only if nothing is
+    queued under the same key yet. Priority is ignored.
+    '''
+    def update(self, x, priority, key):
+        if key in self.keys:
+            return False
+        self.push(x, key)
+        return True
+
+    def __contains__(self, key):
+        return key in self.keys
+
+    def __len__(self):
+        return len(self.queue)
 
     def isEmpty(self):
         return len(self.queue) == 0
 
 '''
-Modified queue data structure where each item has an associated priority
+Modified queue data structure where each item has an associated priority.
+Items pushed with a key are indexed by it: membership is O(1) and update()
+lowers a key's priority in O(log n) by pushing a new heap entry and lazily
+discarding the stale one when it surfaces.
 '''
 class PriorityQueue:
 
+    # Marks a heap entry that was superseded by update()
+    REMOVED = object()
+
     def __init__(self):
         self.queue = []
         self.size = 0
-
-    def push(self, x, priority):
-        item = (priority, self.size, x)
-        heapq.heappush(self.queue, item)
+        # key -> live heap entry [priority, count, item, key]
+        self.index = {}
+        self.live = 0
+
+    def push(self, x, priority, key=None):
+        if key is not None and key in self.index:
+            self.remove(key)
+        entry = [priority, self.size, x, key]
+        heapq.heappush(self.queue, entry)
         self.size += 1
+        self.live += 1
+        if key is not None:
+            self.index[key] = entry
+
+    def pop(self):
+        while True:
+            (_, _, x, key) = heapq.heappop(self.queue)
+            if x is not PriorityQueue.REMOVED:
+                if key is not None:
+                    del self.index[key]
+                self.live -= 1
+                return x
+
+    '''
+    Returns: (priority, item) of the item pop() would return, leaving it queued
+    '''
+    def peek(self):
+        while self.queue[0][2] is PriorityQueue.REMOVED:
+            heapq.heappop(self.queue)
+        return self.queue[0][0], self.queue[0][2]
+
+    '''
+    Pushes the item under the given key, or lowers the priority of the
+    item already queued under that key (replacing it) if the new one is lower.
+    Returns true if the queue changed.
+    '''
+    def update(self, x, priority, key):
+        entry = self.index.get(key)
+        if entry is not None and entry[0] <= priority:
+            return False
+        self.push(x, priority, key)
+        return True
+
+    def remove(self, key):
+        entry = self.index.pop(key)
+        entry[2] = PriorityQueue.REMOVED
+        self.live -= 1
+
+    def __contains__(self, key):
+        return key in self.index
+
+    def __len__(self):
+        return self.live
+
+    def isEmpty(self):
+        return self.live == 0
+
+
+'''
+Wraps a Stack, Queue or PriorityQueue for an instrumented search,
+timing every frontier operation and tracking the peak frontier size
+'''
+class InstrumentedFrontier:
+
+    def __init__(self, frontier, stats):
+        self.frontier = frontier
+        self.stats = stats
+
+    def update(self, x, priority, key):
+        start = time.perf_counter()
+        changed = self.frontier.update(x, priority, key)
+        self.stats.frontier_time += time.perf_counter() - start
+        size = len(self.frontier)
+        if size > self.stats.frontier_peak:
+            self.stats.frontier_peak = size
+        return changed
 
     def pop(self):
-        (_, _, x) = heapq.heappop(self.queue)
+        start = time.perf_counter()
+        x = self.frontier.pop()
+        self.stats.frontier_time += time.perf_counter() - start
         return x
 
     def isEmpty(self):
-        return len(self.queue) == 0
+        return self.frontier.isEmpty()
 
 
 class Action(Enum):
@@ -74,8 +225,8 @@ class Action(Enum):
 Returns the Manhattan distance between points xy1 and xy2
 '''
 def manhattanDistance( state ):
-    xy1 = state['snake'].head.pos
-    xy2 = state['food']
+    xy1 = state.head
+    xy2 = state.food
     return abs( xy1[0] - xy2[0] ) + abs( xy1[1] - xy2[1] )
 
 
@@ -87,15 +238,15 @@ Returns manhattan distance minus that count
 '''
 def foodTrappedHeuristic( state ):
     manhattan = manhattanDistance(state)
-    adjacent_positions = adjacent_to_food(state['food'])
-    adjacent_segments = trapped_food(state['snake'].body, adjacent_positions)
+    adjacent_positions = adjacent_to_food(state.food)
+    adjacent_segments = trapped_food(state.body, adjacent_positions, state.board)
     if len(adjacent_segments) >= 2:
         max_i = 0
-        for pos, i in enumerate(state['snake'].body):
+        for i, pos in enumerate(state.body):
             if pos in adjacent_segments:
                 if i > max_i:
                     max_i = i
-        rem_segments = len(state['snake'].body[max_i:])
+        rem_segments = len(state.body[max_i:])
         return manhattan - rem_segments
     else:
         return manhattan
@@ -106,6 +257,168 @@ def foodTrappedHeuristic( state ):
 
 
 
+'''
+Shortest-path distance to the food around the snake's body as it moves.
+prepare() fills a table from the start state of the search, once per planning
+call (graph_search calls it with the start state): for every depth d and
+cell, the fewest moves from that cell at depth d to the food, where a body
+cell can only be entered once it has freed up (SnakeState.release_times).
+Each evaluation is then a lookup at the state's depth (SnakeState.depth or
+TimedState.depth, counted from the start state).
+The table stops at a horizon of max_entries // cells depths, treating cells
+that free up later as free from the horizon on, so building it costs the same
+however long the snake is. That, and the cells the head itself fills on the
+way, can only make the true distance longer, so the heuristic never
+overestimates and suits A*.
+'''
+class FoodDistanceHeuristic:
+
+    def __init__(self, max_entries=1 << 20):
+        self.__name__ = "foodDistanceHeuristic"
+        self.max_entries = max_entries
+        self.food = None
+        self.board = None
+        self.rows = self.cols = 0
+        # Depth of the start state, depths are counted from it
+        self.origin = 0
+        # Flat table[d * cells + x * cols + y]; from the horizon on it is the Manhattan distance
+        self.table = None
+        self.horizon = 0
+
+    def prepare(self, state):
+        self.food = state.food
+        self.board = state.board
+        self.rows, self.cols = state.board.rows, state.board.cols
+        self.origin = state.depth
+        horizon = max(1, self.max_entries // state.board.cells)
+        self.table = food_distance_table(state.food, state.release_times(), state.board, horizon)
+        self.horizon = len(self.table) // state.board.cells - 1
+
+    def __call__(self, state):
+        if state.food != self.food or state.board is not self.board:
+            self.prepare(state)
+        x, y = state.head
+        rows, cols = self.rows, self.cols
+        if 0 <= x < rows and 0 <= y < cols:
+            depth = state.depth - self.origin
+            if depth > self.horizon:
+                depth = self.horizon
+            return self.table[(depth * rows + x) * cols + y]
+        return manhattanDistance(state)
+
+
+foodDistanceHeuristic = FoodDistanceHeuristic()
+
+
+'''
+Memoizes any heuristic by state, keeping at most maxsize values. Wrapped
+heuristics keep their __name__. The cache only lives for one planning call:
+prepare() clears it and its counters, and is passed on to heuristics that have
+their own. Within a plan a full cache evicts its oldest value, so a hit is a
+single dict lookup on the state's cached hash.
+graph_search records cache_info() in the search's SearchStats.
+'''
+class HeuristicCache:
+
+    def __init__(self, heuristic, maxsize=100000):
+        self.heuristic = heuristic
+        self.maxsize = maxsize
+        self.__name__ = heuristic.__name__
+        # State -> value; states hash on their canonical key, and SnakeState caches that hash
+        self.cache = {}
+        self.hits = 0
+        self.misses = 0
+
+    def prepare(self, state):
+        self.cache.clear()
+        self.hits = 0
+        self.misses = 0
+        prepare = getattr(self.heuristic, 'prepare', None)
+        if prepare is not None:
+            prepare(state)
+
+    def __call__(self, state):
+        cache = self.cache
+        value = cache.get(state)
+        if value is not None:
+            self.hits += 1
+            return value
+        self.misses += 1
+        value = self.heuristic(state)
+        if len(cache) >= self.maxsize:
+            del cache[next(iter(cache))]
+        cache[state] = value
+        return value
+
+    def cache_info(self):
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self.cache), 'maxsize': self.maxsize}
+
+
+'''
+Fewest moves to the food from every cell at every depth, where a cell can only
+be entered once its release time has passed. Filled backwards from the horizon
+(the last release, or the given one if sooner, from which every cell counts as
+free), where the distance is Manhattan: at depth d, a cell is one move further
+than its best neighbour that may be entered at depth d + 1. Vectorized with
+NumPy: each depth takes the minimum of the next one shifted in the four directions.
+Input: food, the food cell
+       release, list over flat cell indices of the first depth each cell may be entered
+       horizon, the last depth to tabulate (default the last release)
+Returns: array.array of ints over depths 0 to the horizon, table[d * cells + x * cols + y];
+         cells from which the food cannot be reached hold board.cells + horizon + 1
+'''
+def food_distance_table(food, release, board=DEFAULT_BOARD, horizon=None):
+    if horizon is None or horizon > max(release):
+        horizon = max(release)
+    if np is None:
+        return food_distance_table_lists(food, release, board, horizon)
+    unreachable = board.cells + horizon + 1
+    shape = (board.rows, board.cols)
+    release = np.minimum(np.array(release, dtype=np.int32).reshape(shape), horizon)
+    table = np.empty((horizon + 1,) + shape, dtype=np.int32)
+    xs, ys = np.indices(shape)
+    table[horizon] = np.abs(xs - food[0]) + np.abs(ys - food[1])
+    best = np.empty(shape, dtype=np.int32)
+    for depth in range(horizon - 1, -1, -1):
+        enterable = np.where(release <= depth + 1, table[depth + 1], unreachable)
+        best.fill(unreachable)
+        np.minimum(best[1:, :], enterable[:-1, :], out=best[1:, :])
+        np.minimum(best[:-1, :], enterable[1:, :], out=best[:-1, :])
+        np.minimum(best[:, 1:], enterable[:, :-1], out=best[:, 1:])
+        np.minimum(best[:, :-1], enterable[:, 1:], out=best[:, :-1])
+        np.minimum(best + 1, unreachable, out=table[depth])
+        table[depth][food] = 0
+    # Indexing an array.array gives plain ints, cheaper than NumPy scalars
+    return array('i', table.tobytes())
+
+
+def food_distance_table_lists(food, release, board=DEFAULT_BOARD, horizon=None):
+    if horizon is None or horizon > max(release):
+        horizon = max(release)
+    unreachable = board.cells + horizon + 1
+    rows, cols = board.rows, board.cols
+    layer = [abs(x - food[0]) + abs(y - food[1]) for x in range(rows) for y in range(cols)]
+    layers = [layer]
+    food_index = food[0] * cols + food[1]
+    for depth in range(horizon - 1, -1, -1):
+        enterable = [layer[i] if min(release[i], horizon) <= depth + 1 else unreachable for i in range(board.cells)]
+        next_layer = [unreachable] * board.cells
+        for x in range(rows):
+            for y in range(cols):
+                best = unreachable
+                for nx, ny in adjacent_to_food((x, y)):
+                    if 0 <= nx < rows and 0 <= ny < cols and enterable[nx * cols + ny] < best:
+                        best = enterable[nx * cols + ny]
+                next_layer[x * cols + y] = min(best + 1, unreachable)
+        next_layer[food_index] = 0
+        layer = next_layer
+        layers.append(layer)
+    table = array('i')
+    for layer in reversed(layers):
+        table.extend(layer)
+    return table
+
+
 '''
 Returns the 4 coordinates adjacent to the current food position.
 '''
@@ -119,29 +432,149 @@ def adjacent_to_food( food_pos ):
 '''
 Returns the body segments adjacent to the food
 '''
-def trapped_food (body, adjacents):
+def trapped_food (body, adjacents, board=DEFAULT_BOARD):
     hits = []
     for adj in adjacents:
-        if adj in body or out_of_bounds(adj):
+        if adj in body or out_of_bounds(adj, board):
             hits.append(adj)
     return hits
 
 '''
 Returns true if the given position is out of game bounds, false otherwise
 '''
-def out_of_bounds(pos):
-    return pos[0] < 0 or pos[1] < 0 or pos[0] >= ROWS or pos[1] >= COLS
+def out_of_bounds(pos, board=DEFAULT_BOARD):
+    return pos[0] < 0 or pos[1] < 0 or pos[0] >= board.rows or pos[1] >= board.cols
 
 '''
-Class to log information about the
+Counters filled in by one instrumented search (see search.graph_search).
+Searches run without one pay nothing for instrumentation.
+'''
+class SearchStats:
+
+    def __init__(self):
+        self.expanded = 0
+        self.generated = 0
+        self.frontier_peak = 0
+        self.closed_size = 0
+        # Seconds spent in each part of the search
+        self.successor_time = 0.0
+        self.heuristic_time = 0.0
+        self.frontier_time = 0.0
+        # True if the frontier ran dry and the fallback move was used
+        self.failsafe = False
+        # True if the search ran out of its SearchBudget
+        self.deadline_hit = False
+        # cache_info() of a HeuristicCache heuristic, None for other heuristics
+        self.heuristic_cache = None
+
+    '''
+    Returns: the successor function, counting expanded and generated nodes and timing each call
+    '''
+    def timed_successors(self, successors):
+        def timed(state):
+            start = time.perf_counter()
+            result = successors(state)
+            self.successor_time += time.perf_counter() - start
+            self.expanded += 1
+            self.generated += len(result)
+            return result
+        return timed
+
+    '''
+    Returns: the heuristic, timing each call
+    '''
+    def timed_heuristic(self, heuristic):
+        def timed(state):
+            start = time.perf_counter()
+            value = heuristic(state)
+            self.heuristic_time += time.perf_counter() - start
+            return value
+        return timed
+
+    def to_dict(self):
+        return dict(vars(self))
+
+
+'''
+Per-plan limit on a search, in wall clock seconds and/or expanded nodes.
+A search given one (see search.graph_search) checks it before every
+expansion and, once it runs out, returns its best partial plan instead, so
+it overruns by at most one expansion (plus any interpreter pauses).
+'''
+class SearchBudget:
+
+    def __init__(self, seconds=None, nodes=None):
+        self.seconds = seconds
+        self.nodes = nodes
+        self.deadline = None
+        # True if the last search ran out of budget
+        self.hit = False
+        # Nodes the last search had expanded when it last checked
+        self.used = 0
+
+    def start(self):
+        self.hit = False
+        self.used = 0
+        if self.seconds is not None:
+            self.deadline = time.perf_counter() + self.seconds
+
+    '''
+    Input: expanded, nodes the search has expanded so far
+    Returns: true once the search is out of time or nodes
+    '''
+    def expired(self, expanded):
+        self.used = expanded
+        if self.nodes is not None and expanded >= self.nodes:
+            self.hit = True
+        elif self.seconds is not None and time.perf_counter() >= self.deadline:
+            self.hit = True
+        return self.hit
+
+    '''
+    Input: expanded, nodes the search has expanded so far (default: as of its
+           last check)
+    Returns: a new budget for what is left of this one, for a search that
+             carries on where this one stops (see search.resume)
+    '''
+    def remaining(self, expanded=None):
+        if expanded is None:
+            expanded = self.used
+        seconds = None
+        if self.seconds is not None:
+            seconds = max(0.0, self.deadline - time.perf_counter())
+        nodes = None
+        if self.nodes is not None:
+            nodes = max(0, self.nodes - expanded)
+        return SearchBudget(seconds, nodes)
+
+
+'''
+Class to log information about the search times and score of one game.
+A turn is the stretch of play from one food to the next; its time sums every
+plan timed by the stopwatch in it, so agents that plan one move at a time
+are timed per food like those that plan a whole path.
+Saved as JSON lines: one "turn" record per food eaten, one "search" record per
+instrumented search, then one "game" record.
 '''
 
 class Log:
 
-    def __init__(self, algo_name, heuristic=None):
+    def __init__(self, algo_name, heuristic=None, seed=None, board=None):
         self.algo_name = algo_name
         self.heuristic = heuristic
+        # Seed of the game's random.Random, to replay it exactly
+        self.seed = seed
+        # setup.Board the game was played on
+        self.board = board
+        # (planning time, score, plans) per food eaten
         self.record = []
+        # Planning time and plans since the last food
+        self.turn_time = 0.0
+        self.turn_plans = 0
+        # SearchStats dicts of instrumented searches, one per plan
+        self.searches = []
+        # Searches that ran out of their SearchBudget
+        self.deadline_hits = 0
         self.death = None
         self.start_time = None
         self.end_time = None
@@ -151,6 +584,8 @@ class Log:
         cat += "Algorithm: " + self.algo_name + "\n"
         if self.heuristic:
             cat += "Heuristic: " + self.heuristic + "\n"
+        if self.seed is not None:
+            cat += "Seed: " + str(self.seed) + "\n"
         total_time = 0
         score = 0
         times = []
@@ -187,18 +622,66 @@ class Log:
         return cat
 
     def start_stopwatch(self):
-        self.start_time = time.clock()
+        self.start_time = time.perf_counter()
 
     def stop_stopwatch(self):
-        self.end_time = time.clock()
+        self.end_time = time.perf_counter()
+        self.turn_time += self.end_time - self.start_time
+        self.turn_plans += 1
 
     def update(self, score):
-        self.record.append((self.end_time - self.start_time, score))
+        self.record.append((self.turn_time, score, self.turn_plans))
+        self.turn_time = 0.0
+        self.turn_plans = 0
+
+    '''
+    Records the SearchStats of the search just timed by the stopwatch
+    '''
+    def record_search(self, stats):
+        search = stats.to_dict()
+        search['time'] = self.end_time - self.start_time
+        self.searches.append(search)
+
+    def record_deadline_hit(self):
+        self.deadline_hits += 1
 
     def terminate(self, reason):
         self.death = reason
 
+    '''
+    Returns: the log as a list of flat dicts, the turn records followed by the game record
+    '''
+    def to_records(self):
+        header = {'algorithm': self.algo_name, 'heuristic': self.heuristic, 'seed': self.seed}
+        if self.board is not None:
+            header['rows'] = self.board.rows
+            header['cols'] = self.board.cols
+        records = []
+        total_time = 0
+        for i in range(len(self.record)):
+            total_time += self.record[i][0]
+            turn = {'type': 'turn', 'turn': i + 1, 'time': self.record[i][0], 'score': self.record[i][1],
+                    'plans': self.record[i][2]}
+            turn.update(header)
+            records.append(turn)
+        for i in range(len(self.searches)):
+            search = {'type': 'search', 'plan': i + 1}
+            search.update(self.searches[i])
+            search.update(header)
+            records.append(search)
+        game = {'type': 'game',
+                'score': self.record[-1][1] if self.record else 0,
+                'turns': len(self.record),
+                'death': self.death,
+                'deadline_hits': self.deadline_hits,
+                'total_time': total_time,
+                'average_time': total_time / len(self.record) if self.record else None}
+        game.update(header)
+        records.append(game)
+        return records
+
     def save(self, filename):
         file = open(filename, 'a')
-        file.write(str(self))
+        for record in self.to_records():
+            file.write(json.dumps(record, separators=(',', ':')) + "\n")
         file.close()